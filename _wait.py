@@ -0,0 +1,23 @@
+"""
+Server readiness probe shared by the verify scripts.
+"""
+import time
+import requests
+
+def wait_for_server(session, url, timeout=30):
+    """Poll url until it answers 200, backing off from 20ms to 0.5s between probes.
+
+    Returns True once the server is ready, False if timeout seconds pass first.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.02
+    while True:
+        try:
+            if session.get(url, timeout=0.2).status_code == 200:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        if time.monotonic() + delay > deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.5)
@@ -1,31 +1,87 @@
-import os
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, Body
-from typing import List, Union
-from models import ProjectState, BaseArtifact, Requirement, RiskHazard, RiskCause, VerificationActivity, Trace
-from storage import GitStorage
+from collections import ChainMap
+from types import SimpleNamespace
+from fastapi import APIRouter, HTTPException, Body, Depends, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from typing import Any, AsyncIterator, Dict, List, Optional
+from models import ArtifactBatch, ProjectState, Requirement, Trace, ArtifactUnion
+from storage import GitStorage, serialize_artifact
+from api.projects import get_storage, project_lock
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-PROJECTS_ROOT = "c:/projects/sealmit/projects_data"
+# Write-hot endpoints validate the raw body with these, skipping the intermediate dict FastAPI would build
+_ARTIFACT_ADAPTER = TypeAdapter(ArtifactUnion)
+_TRACE_ADAPTER = TypeAdapter(Trace)
 
-def get_storage(project_name: str) -> GitStorage:
-    """Get GitStorage instance for a project with error handling."""
+def _json_body_openapi(adapter: TypeAdapter) -> Dict[str, Any]:
+    """Describe a JSON request body in OpenAPI for a route that parses it itself."""
+    schema = adapter.json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+async def _parse_json_body(request: Request, adapter: TypeAdapter):
+    """Validate the request body bytes in a single pydantic-core pass."""
     try:
-        project_path = os.path.join(PROJECTS_ROOT, project_name)
-        if not os.path.exists(project_path):
-            logger.warning(f"Project not found: {project_name}")
-            raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
-        return GitStorage(project_path)
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error accessing project {project_name}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error accessing project")
+        return adapter.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
+class _CommitBatch:
+    """Commit requests for one project that will be made as a single Git commit."""
+    def __init__(self):
+        self.messages: List[str] = []
+        self.task: Optional[asyncio.Task] = None
+
+# Per project: the batch still taking requests, and the commit currently running
+_open_batches: Dict[str, _CommitBatch] = {}
+_running_commits: Dict[str, asyncio.Task] = {}
+
+async def coalesced_commit(project_name: str, storage: GitStorage, message: str) -> str:
+    """Commit a project, merging with requests that arrive while an earlier commit runs.
+
+    Returns the sha of the commit that includes this request. A lone request commits at once;
+    the commit runs in its own task, so a cancelled request never stops it for the others.
+    """
+    batch = _open_batches.get(project_name)
+    if batch is None:
+        batch = _open_batches[project_name] = _CommitBatch()
+        batch.task = asyncio.create_task(_run_commit_batch(project_name, storage, batch))
+        # Nobody may be left to read a failure if every request was cancelled
+        batch.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    batch.messages.append(message)
+    return await asyncio.shield(batch.task)
+
+async def _run_commit_batch(project_name: str, storage: GitStorage, batch: _CommitBatch) -> str:
+    # Requests arriving while the previous commit runs join this batch
+    previous = _running_commits.get(project_name)
+    if previous is not None:
+        await asyncio.wait([previous])
+    # Requests from here on start the next batch
+    del _open_batches[project_name]
+    _running_commits[project_name] = batch.task
+    try:
+        async with project_lock(project_name, storage):
+            return await storage.commit_async("\n\n".join(dict.fromkeys(batch.messages)))
+    finally:
+        if _running_commits.get(project_name) is batch.task:
+            del _running_commits[project_name]
+
+async def batch_storage(project_name: str) -> AsyncIterator[GitStorage]:
+    """Storage whose save_draft calls are deferred until the handler calls end_batch."""
+    storage = await asyncio.to_thread(get_storage, project_name)
+    storage.begin_batch()
+    try:
+        yield storage
+    finally:
+        # A no-op once the handler ended the batch
+        storage.abort_batch()
 
 def validate_requirement(requirement: Requirement, state: ProjectState) -> None:
     """Validate requirement based on project settings.
@@ -49,7 +105,6 @@ def validate_requirement(requirement: Requirement, state: ProjectState) -> None:
     # Validate orphan prevention
     if settings.prevent_orphans_at_lower_levels:
         # Check if this is a top-level requirement
-        level_names = state.config.get_level_names()
         top_level_name = state.config.get_top_level_name()
         
         is_top_level = requirement.level == top_level_name
@@ -75,141 +130,179 @@ def validate_requirement(requirement: Requirement, state: ProjectState) -> None:
                 detail=f"Parent '{parent_id}' is not a requirement"
             )
 
-@router.post("/{project_name}/artifacts", response_model=Union[Requirement, RiskHazard, RiskCause, VerificationActivity, BaseArtifact])
-def create_artifact(project_name: str, artifact: Union[Requirement, RiskHazard, RiskCause, VerificationActivity] = Body(...)):
+@router.post("/{project_name}/artifacts", response_model=ArtifactUnion, openapi_extra=_json_body_openapi(_ARTIFACT_ADAPTER))
+async def create_artifact(project_name: str, request: Request):
     """Create a new artifact in the project."""
+    artifact = await _parse_json_body(request, _ARTIFACT_ADAPTER)
     try:
-        logger.info(f"Creating artifact in project {project_name}: {artifact.type}")
-        storage = get_storage(project_name)
-        state = storage.load_project()
+        logger.info("Creating artifact in project %s: %s", project_name, artifact.type.value)
+        storage = await asyncio.to_thread(get_storage, project_name)
+        async with project_lock(project_name, storage):
+            state = await storage.load_project_cached_async()
         
-        # Validate artifact doesn't already exist
-        if artifact.id in state.artifacts:
-            logger.warning(f"Artifact {artifact.id} already exists in project {project_name}")
-            raise HTTPException(status_code=400, detail="Artifact with this ID already exists")
+            # Validate artifact doesn't already exist
+            if artifact.id in state.artifacts:
+                logger.warning("Artifact %s already exists in project %s", artifact.id, project_name)
+                raise HTTPException(status_code=400, detail="Artifact with this ID already exists")
         
-        # Validate requirements based on project settings
-        if isinstance(artifact, Requirement):
-            validate_requirement(artifact, state)
+            # Validate requirements based on project settings
+            if isinstance(artifact, Requirement):
+                validate_requirement(artifact, state)
         
-        state.artifacts[artifact.id] = artifact
-        storage.save_draft(state)
+            state.set_artifact(artifact)
+            await storage.save_draft_async(state)
         
-        logger.info(f"Successfully created artifact {artifact.id} in project {project_name}")
+        logger.info("Successfully created artifact %s in project %s", artifact.id, project_name)
         return artifact
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error creating artifact in project {project_name}: {str(e)}")
+        logger.error("Error creating artifact in project %s: %s", project_name, e)
         raise HTTPException(status_code=500, detail="Failed to create artifact")
 
-@router.put("/{project_name}/artifacts/{artifact_id}", response_model=Union[Requirement, RiskHazard, RiskCause, VerificationActivity, BaseArtifact])
-def update_artifact(project_name: str, artifact_id: str, artifact: Union[Requirement, RiskHazard, RiskCause, VerificationActivity] = Body(...)):
+@router.post("/{project_name}/artifacts/bulk", response_model=List[ArtifactUnion])
+async def create_artifacts(project_name: str, batch: ArtifactBatch, storage: GitStorage = Depends(batch_storage)):
+    """Create many artifacts with one save and, given a message, one commit."""
+    try:
+        logger.info("Creating %s artifacts in project %s", len(batch.artifacts), project_name)
+        async with project_lock(project_name, storage):
+            state = await storage.load_project_cached_async()
+
+            # Validate everything before changing the state; parents may be earlier or later in the batch
+            new_artifacts = {}
+            for artifact in batch.artifacts:
+                if artifact.id in state.artifacts or artifact.id in new_artifacts:
+                    logger.warning("Artifact %s already exists in project %s", artifact.id, project_name)
+                    raise HTTPException(status_code=400, detail=f"Artifact with ID '{artifact.id}' already exists")
+                new_artifacts[artifact.id] = artifact
+            view = SimpleNamespace(config=state.config, artifacts=ChainMap(new_artifacts, state.artifacts))
+            for artifact in batch.artifacts:
+                if isinstance(artifact, Requirement):
+                    validate_requirement(artifact, view)
+                # Content the XML files can't hold would fail the save after the state changed
+                try:
+                    serialize_artifact(artifact)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=f"Artifact '{artifact.id}' cannot be stored: {e}")
+
+            for artifact in batch.artifacts:
+                state.set_artifact(artifact)
+            await storage.save_draft_async(state)
+            await storage.end_batch_async(batch.message)
+
+        logger.info("Successfully created %s artifacts in project %s", len(batch.artifacts), project_name)
+        return batch.artifacts
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error creating artifacts in project %s: %s", project_name, e)
+        raise HTTPException(status_code=500, detail="Failed to create artifacts")
+
+@router.put("/{project_name}/artifacts/{artifact_id}", response_model=ArtifactUnion)
+async def update_artifact(project_name: str, artifact_id: str, artifact: ArtifactUnion = Body(...)):
     """Update an existing artifact."""
     try:
-        logger.info(f"Updating artifact {artifact_id} in project {project_name}")
-        storage = get_storage(project_name)
-        state = storage.load_project()
-        
-        if artifact_id not in state.artifacts:
-            logger.warning(f"Artifact {artifact_id} not found in project {project_name}")
-            raise HTTPException(status_code=404, detail=f"Artifact '{artifact_id}' not found")
-        
-        # Ensure ID matches
-        if artifact.id != artifact_id:
-            logger.warning(f"Artifact ID mismatch: URL={artifact_id}, Body={artifact.id}")
-            raise HTTPException(status_code=400, detail="Artifact ID in URL must match ID in request body")
-        
-        # Validate requirements based on project settings
-        if isinstance(artifact, Requirement):
-            validate_requirement(artifact, state)
+        logger.info("Updating artifact %s in project %s", artifact_id, project_name)
+        storage = await asyncio.to_thread(get_storage, project_name)
+        async with project_lock(project_name, storage):
+            state = await storage.load_project_cached_async()
+        
+            if artifact_id not in state.artifacts:
+                logger.warning("Artifact %s not found in project %s", artifact_id, project_name)
+                raise HTTPException(status_code=404, detail=f"Artifact '{artifact_id}' not found")
+        
+            # Ensure ID matches
+            if artifact.id != artifact_id:
+                logger.warning("Artifact ID mismatch: URL=%s, Body=%s", artifact_id, artifact.id)
+                raise HTTPException(status_code=400, detail="Artifact ID in URL must match ID in request body")
+        
+            # Validate requirements based on project settings
+            if isinstance(artifact, Requirement):
+                validate_requirement(artifact, state)
             
-        state.artifacts[artifact_id] = artifact
-        storage.save_draft(state)
+            state.set_artifact(artifact)
+            await storage.save_draft_async(state)
         
-        logger.info(f"Successfully updated artifact {artifact_id} in project {project_name}")
+        logger.info("Successfully updated artifact %s in project %s", artifact_id, project_name)
         return artifact
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating artifact {artifact_id} in project {project_name}: {str(e)}")
+        logger.error("Error updating artifact %s in project %s: %s", artifact_id, project_name, e)
         raise HTTPException(status_code=500, detail="Failed to update artifact")
 
 @router.delete("/{project_name}/artifacts/{artifact_id}")
-def delete_artifact(project_name: str, artifact_id: str):
+async def delete_artifact(project_name: str, artifact_id: str):
     """Delete an artifact and all its associated traces."""
     try:
-        logger.info(f"Deleting artifact {artifact_id} from project {project_name}")
-        storage = get_storage(project_name)
-        state = storage.load_project()
+        logger.info("Deleting artifact %s from project %s", artifact_id, project_name)
+        storage = await asyncio.to_thread(get_storage, project_name)
+        async with project_lock(project_name, storage):
+            state = await storage.load_project_cached_async()
         
-        if artifact_id not in state.artifacts:
-            logger.warning(f"Artifact {artifact_id} not found in project {project_name}")
-            raise HTTPException(status_code=404, detail=f"Artifact '{artifact_id}' not found")
+            if artifact_id not in state.artifacts:
+                logger.warning("Artifact %s not found in project %s", artifact_id, project_name)
+                raise HTTPException(status_code=404, detail=f"Artifact '{artifact_id}' not found")
         
-        # Count traces that will be removed
-        traces_to_remove = [t for t in state.traces if t.source_id == artifact_id or t.target_id == artifact_id]
+            traces_to_remove = state.delete_artifact(artifact_id)
         
-        del state.artifacts[artifact_id]
-        state.traces = [t for t in state.traces if t.source_id != artifact_id and t.target_id != artifact_id]
-        
-        storage.save_draft(state)
-        logger.info(f"Successfully deleted artifact {artifact_id} and {len(traces_to_remove)} associated traces")
+            await storage.save_draft_async(state)
+        logger.info("Successfully deleted artifact %s and %s associated traces", artifact_id, len(traces_to_remove))
         return {"status": "success", "traces_removed": len(traces_to_remove)}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting artifact {artifact_id} from project {project_name}: {str(e)}")
+        logger.error("Error deleting artifact %s from project %s: %s", artifact_id, project_name, e)
         raise HTTPException(status_code=500, detail="Failed to delete artifact")
 
-@router.post("/{project_name}/traces", response_model=Trace)
-def create_trace(project_name: str, trace: Trace):
+@router.post("/{project_name}/traces", response_model=Trace, openapi_extra=_json_body_openapi(_TRACE_ADAPTER))
+async def create_trace(project_name: str, request: Request):
     """Create a traceability link between two artifacts."""
+    trace = await _parse_json_body(request, _TRACE_ADAPTER)
     try:
-        logger.info(f"Creating trace in project {project_name}: {trace.source_id} -> {trace.target_id} ({trace.type})")
-        storage = get_storage(project_name)
-        state = storage.load_project()
-        
-        # Validate IDs
-        if trace.source_id not in state.artifacts:
-            logger.warning(f"Source artifact {trace.source_id} not found in project {project_name}")
-            raise HTTPException(status_code=400, detail=f"Source artifact '{trace.source_id}' not found")
-        if trace.target_id not in state.artifacts:
-            logger.warning(f"Target artifact {trace.target_id} not found in project {project_name}")
-            raise HTTPException(status_code=400, detail=f"Target artifact '{trace.target_id}' not found")
-        
-        # Check for duplicate traces
-        for existing_trace in state.traces:
-            if (existing_trace.source_id == trace.source_id and 
-                existing_trace.target_id == trace.target_id and 
-                existing_trace.type == trace.type):
-                logger.warning(f"Duplicate trace detected in project {project_name}")
+        logger.info("Creating trace in project %s: %s -> %s (%s)", project_name, trace.source_id, trace.target_id, trace.type.value)
+        storage = await asyncio.to_thread(get_storage, project_name)
+        async with project_lock(project_name, storage):
+            state = await storage.load_project_cached_async()
+        
+            # Validate IDs
+            if trace.source_id not in state.artifacts:
+                logger.warning("Source artifact %s not found in project %s", trace.source_id, project_name)
+                raise HTTPException(status_code=400, detail=f"Source artifact '{trace.source_id}' not found")
+            if trace.target_id not in state.artifacts:
+                logger.warning("Target artifact %s not found in project %s", trace.target_id, project_name)
+                raise HTTPException(status_code=400, detail=f"Target artifact '{trace.target_id}' not found")
+        
+            # Check for duplicate traces
+            if state.has_trace(trace):
+                logger.warning("Duplicate trace detected in project %s", project_name)
                 raise HTTPException(status_code=400, detail="This trace already exists")
         
-        state.traces.append(trace)
-        storage.save_draft(state)
-        logger.info(f"Successfully created trace in project {project_name}")
+            state.add_trace(trace)
+            await storage.save_draft_async(state)
+        logger.info("Successfully created trace in project %s", project_name)
         return trace
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error creating trace in project {project_name}: {str(e)}")
+        logger.error("Error creating trace in project %s: %s", project_name, e)
         raise HTTPException(status_code=500, detail="Failed to create trace")
 
 @router.post("/{project_name}/commit")
-def commit_changes(project_name: str, message: str = Body(..., embed=True)):
+async def commit_changes(project_name: str, message: str = Body(..., embed=True)):
     """Commit all pending changes to Git repository."""
     try:
         if not message or not message.strip():
             raise HTTPException(status_code=400, detail="Commit message cannot be empty")
         
-        logger.info(f"Committing changes to project {project_name}: {message}")
-        storage = get_storage(project_name)
-        storage.commit(message)
-        logger.info(f"Successfully committed changes to project {project_name}")
-        return {"status": "committed", "message": message}
+        logger.info("Committing changes to project %s: %s", project_name, message)
+        storage = await asyncio.to_thread(get_storage, project_name)
+        sha = await coalesced_commit(project_name, storage, message)
+        logger.info("Successfully committed changes to project %s as %s", project_name, sha)
+        # Concurrent requests may share a commit; its message joining theirs stays in git only
+        return {"status": "committed", "message": message, "sha": sha}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error committing changes to project {project_name}: {str(e)}")
+        logger.error("Error committing changes to project %s: %s", project_name, e)
         raise HTTPException(status_code=500, detail="Failed to commit changes")
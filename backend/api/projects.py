@@ -1,13 +1,16 @@
 import os
 import re
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException
-from typing import List
-from models import ProjectConfig, ProjectState, ProjectSettings, RequirementLevel
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import orjson
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, Iterator, List, Optional, Tuple
+from models import BaseArtifact, ProjectConfig, ProjectState, ProjectSettings, RequirementLevel, Trace
 from storage import GitStorage
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -15,166 +18,243 @@ router = APIRouter()
 PROJECTS_ROOT = "c:/projects/sealmit/projects_data"
 os.makedirs(PROJECTS_ROOT, exist_ok=True)
 
+@lru_cache(maxsize=512)
+def _project_path(root: str, name: str) -> str:
+    # Keyed by root as well as name, so rebinding PROJECTS_ROOT never returns a stale path
+    return os.path.join(root, name)
+
 def get_storage(project_name: str) -> GitStorage:
-    """Get GitStorage instance for a project."""
-    project_path = os.path.join(PROJECTS_ROOT, project_name)
-    return GitStorage(project_path)
+    """Get GitStorage instance for an existing project, raising 404 if it doesn't exist."""
+    try:
+        project_path = _project_path(PROJECTS_ROOT, project_name)
+        try:
+            os.stat(project_path)
+        except FileNotFoundError:
+            logger.warning("Project not found: %s", project_name)
+            raise HTTPException(status_code=404, detail=f"Project '{project_name}' not found")
+        return GitStorage(project_path)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error accessing project %s: %s", project_name, e)
+        raise HTTPException(status_code=500, detail="Internal server error accessing project")
+
+_PROJECT_NAME_RE = re.compile(r'[a-zA-Z0-9_-]{1,100}')
+
+_project_locks: Dict[str, asyncio.Lock] = {}
+
+@asynccontextmanager
+async def project_lock(project_name: str, storage: GitStorage):
+    """Serialize writes to a project, within this worker and across workers."""
+    async with _project_locks.setdefault(project_name, asyncio.Lock()):
+        file_lock = storage.file_lock()
+        await asyncio.to_thread(file_lock.acquire)
+        try:
+            yield
+        finally:
+            file_lock.release()
 
 def validate_project_name(name: str) -> bool:
     """Validate project name - alphanumeric, underscores, hyphens only."""
-    if not name or len(name) < 1 or len(name) > 100:
-        return False
-    return bool(re.match(r'^[a-zA-Z0-9_-]+$', name))
+    return name is not None and _PROJECT_NAME_RE.fullmatch(name) is not None
+
+@lru_cache(maxsize=8)
+def _list_project_dirs(root: str, mtime_ns: int, nlink: int) -> Tuple[str, ...]:
+    # Keyed by the root's mtime and link count, so adding or removing a project misses the cache
+    with os.scandir(root) as it:
+        return tuple(entry.name for entry in it if entry.is_dir())
+
+def _scan_projects(root: str) -> Optional[List[str]]:
+    """Return the names of all project directories under root, or None if root doesn't exist."""
+    try:
+        st = os.stat(root)
+    except FileNotFoundError:
+        return None
+    return list(_list_project_dirs(root, st.st_mtime_ns, st.st_nlink))
 
 @router.get("/", response_model=List[str])
-def list_projects():
+async def list_projects():
     """List all available projects."""
     try:
-        if not os.path.exists(PROJECTS_ROOT):
+        projects = await asyncio.to_thread(_scan_projects, PROJECTS_ROOT)
+        if projects is None:
             logger.info("Projects root directory doesn't exist yet")
             return []
-        projects = [d for d in os.listdir(PROJECTS_ROOT) if os.path.isdir(os.path.join(PROJECTS_ROOT, d))]
-        logger.info(f"Listed {len(projects)} projects")
+        logger.info("Listed %s projects", len(projects))
         return projects
     except Exception as e:
-        logger.error(f"Error listing projects: {str(e)}")
+        logger.error("Error listing projects: %s", e)
         raise HTTPException(status_code=500, detail="Failed to list projects")
 
 @router.post("/", response_model=ProjectConfig)
-def create_project(config: ProjectConfig):
+async def create_project(config: ProjectConfig):
     """Create a new project with Git repository."""
     try:
         # Validate project name
         if not validate_project_name(config.name):
-            logger.warning(f"Invalid project name: {config.name}")
+            logger.warning("Invalid project name: %s", config.name)
             raise HTTPException(
                 status_code=400, 
                 detail="Project name must be 1-100 characters and contain only letters, numbers, underscores, and hyphens"
             )
         
-        project_path = os.path.join(PROJECTS_ROOT, config.name)
-        if os.path.exists(project_path):
-            logger.warning(f"Project already exists: {config.name}")
+        project_path = _project_path(PROJECTS_ROOT, config.name)
+        if await asyncio.to_thread(os.path.exists, project_path):
+            logger.warning("Project already exists: %s", config.name)
             raise HTTPException(status_code=400, detail=f"Project '{config.name}' already exists")
         
-        logger.info(f"Creating new project: {config.name}")
-        os.makedirs(project_path)
-        storage = GitStorage(project_path)
+        logger.info("Creating new project: %s", config.name)
+        await asyncio.to_thread(os.makedirs, project_path)
+        _list_project_dirs.cache_clear()
+        storage = await asyncio.to_thread(GitStorage, project_path)
         
         # Create initial state
         state = ProjectState(config=config, artifacts={}, traces=[])
-        storage.save_draft(state)
-        storage.commit("Initial project creation")
+        async with project_lock(config.name, storage):
+            await storage.save_draft_async(state)
+            await storage.commit_async("Initial project creation")
         
-        logger.info(f"Successfully created project: {config.name}")
+        logger.info("Successfully created project: %s", config.name)
         return config
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error creating project {config.name}: {str(e)}")
+        logger.error("Error creating project %s: %s", config.name, e)
         raise HTTPException(status_code=500, detail="Failed to create project")
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def _stream_state(config: ProjectConfig, artifacts: List[Tuple[str, BaseArtifact]], traces: List[Trace]) -> Iterator[bytes]:
+    """Yield a project state snapshot as JSON in chunks, dumping one artifact or trace at a time."""
+    buf = bytearray(b'{"config":')
+    buf += config.model_dump_json().encode()
+    buf += b',"artifacts":{'
+    for i, (artifact_id, artifact) in enumerate(artifacts):
+        if i:
+            buf += b','
+        buf += orjson.dumps(artifact_id)
+        buf += b':'
+        buf += artifact.model_dump_json().encode()
+        if len(buf) >= STREAM_CHUNK_SIZE:
+            yield bytes(buf)
+            buf.clear()
+    buf += b'},"traces":['
+    for i, trace in enumerate(traces):
+        if i:
+            buf += b','
+        buf += trace.model_dump_json().encode()
+        if len(buf) >= STREAM_CHUNK_SIZE:
+            yield bytes(buf)
+            buf.clear()
+    buf += b']}'
+    yield bytes(buf)
+
 @router.get("/{name}", response_model=ProjectState)
-def get_project(name: str):
+async def get_project(name: str):
     """Get complete project state including config, artifacts, and traces."""
     try:
-        project_path = os.path.join(PROJECTS_ROOT, name)
-        if not os.path.exists(project_path):
-            logger.warning(f"Project not found: {name}")
-            raise HTTPException(status_code=404, detail=f"Project '{name}' not found")
+        storage = await asyncio.to_thread(get_storage, name)
         
-        logger.info(f"Loading project: {name}")
-        storage = GitStorage(project_path)
-        state = storage.load_project()
-        logger.info(f"Successfully loaded project {name} with {len(state.artifacts)} artifacts and {len(state.traces)} traces")
-        return state
+        logger.info("Loading project: %s", name)
+        state = await storage.load_project_cached_async()
+        logger.info("Successfully loaded project %s with %s artifacts and %s traces", name, len(state.artifacts), len(state.traces))
+        # Snapshot the containers now: the generator body only runs once Starlette starts
+        # iterating it in a worker thread, after writers may have changed the cached state
+        snapshot = (state.config, list(state.artifacts.items()), list(state.traces))
+        # Stream in bounded chunks
+        return StreamingResponse(_stream_state(*snapshot), media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error loading project {name}: {str(e)}")
+        logger.error("Error loading project %s: %s", name, e)
         raise HTTPException(status_code=500, detail="Failed to load project")
 
 @router.get("/{name}/settings", response_model=ProjectSettings)
-def get_project_settings(name: str):
+async def get_project_settings(name: str):
     """Get project settings."""
     try:
-        project_path = os.path.join(PROJECTS_ROOT, name)
-        if not os.path.exists(project_path):
-            logger.warning(f"Project not found: {name}")
-            raise HTTPException(status_code=404, detail=f"Project '{name}' not found")
+        storage = await asyncio.to_thread(get_storage, name)
         
-        logger.info(f"Loading settings for project: {name}")
-        storage = GitStorage(project_path)
-        state = storage.load_project()
+        logger.info("Loading settings for project: %s", name)
+        state = await storage.load_project_cached_async()
         return state.config.settings
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error loading settings for project {name}: {str(e)}")
+        logger.error("Error loading settings for project %s: %s", name, e)
         raise HTTPException(status_code=500, detail="Failed to load project settings")
 
 @router.put("/{name}/settings", response_model=ProjectSettings)
-def update_project_settings(name: str, settings: ProjectSettings):
+async def update_project_settings(name: str, settings: ProjectSettings):
     """Update project settings."""
     try:
-        project_path = os.path.join(PROJECTS_ROOT, name)
-        if not os.path.exists(project_path):
-            logger.warning(f"Project not found: {name}")
-            raise HTTPException(status_code=404, detail=f"Project '{name}' not found")
-        
-        logger.info(f"Updating settings for project: {name}")
-        storage = GitStorage(project_path)
-        state = storage.load_project()
+        storage = await asyncio.to_thread(get_storage, name)
         
-        # Update settings
-        state.config.settings = settings
+        logger.info("Updating settings for project: %s", name)
+        async with project_lock(name, storage):
+            state = await storage.load_project_cached_async()
+            
+            # Update settings
+            state.config.settings = settings
+            
+            # Save and commit
+            await storage.save_draft_async(state)
+            await storage.commit_async("Updated project settings")
         
-        # Save and commit
-        storage.save_draft(state)
-        storage.commit(f"Updated project settings")
-        
-        logger.info(f"Successfully updated settings for project: {name}")
+        logger.info("Successfully updated settings for project: %s", name)
         return settings
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating settings for project {name}: {str(e)}")
+        logger.error("Error updating settings for project %s: %s", name, e)
         raise HTTPException(status_code=500, detail="Failed to update project settings")
 
 @router.put("/{name}/levels", response_model=List[RequirementLevel])
-def update_requirement_levels(name: str, levels: List[RequirementLevel]):
+async def update_requirement_levels(name: str, levels: List[RequirementLevel]):
     """Update requirement levels for a project."""
     try:
-        project_path = os.path.join(PROJECTS_ROOT, name)
-        if not os.path.exists(project_path):
-            logger.warning(f"Project not found: {name}")
-            raise HTTPException(status_code=404, detail=f"Project '{name}' not found")
+        storage = await asyncio.to_thread(get_storage, name)
         
         # Validate levels
         if not levels:
             raise HTTPException(status_code=400, detail="At least one requirement level is required")
         
         # Check for duplicate level names
-        level_names = [level.name for level in levels]
-        if len(level_names) != len(set(level_names)):
-            raise HTTPException(status_code=400, detail="Duplicate level names are not allowed")
-        
-        logger.info(f"Updating requirement levels for project: {name}")
-        storage = GitStorage(project_path)
-        state = storage.load_project()
-        
-        # Update levels
-        state.config.levels = levels
+        seen = set()
+        for level in levels:
+            if level.name in seen:
+                raise HTTPException(status_code=400, detail="Duplicate level names are not allowed")
+            seen.add(level.name)
         
-        # Save and commit
-        storage.save_draft(state)
-        storage.commit(f"Updated requirement levels")
+        logger.info("Updating requirement levels for project: %s", name)
+        async with project_lock(name, storage):
+            state = await storage.load_project_cached_async()
+            
+            # Update levels
+            state.config.levels = levels
+            
+            # Save and commit
+            await storage.save_draft_async(state)
+            await storage.commit_async("Updated requirement levels")
         
-        logger.info(f"Successfully updated {len(levels)} requirement levels for project: {name}")
+        logger.info("Successfully updated %s requirement levels for project: %s", len(levels), name)
         return levels
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating levels for project {name}: {str(e)}")
+        logger.error("Error updating levels for project %s: %s", name, e)
         raise HTTPException(status_code=500, detail="Failed to update requirement levels")
 
+
+@router.get("/{name}/history")
+async def get_project_history(name: str, max_count: Optional[int] = Query(None, ge=1), skip: int = Query(0, ge=0)):
+    """Get the project's commits, newest first."""
+    try:
+        storage = await asyncio.to_thread(get_storage, name)
+        history = await asyncio.to_thread(storage.get_history, max_count, skip)
+        return [commit._asdict() for commit in history]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error loading history for project %s: %s", name, e)
+        raise HTTPException(status_code=500, detail="Failed to load project history")
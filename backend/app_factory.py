@@ -0,0 +1,68 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import anyio.to_thread
+import orjson
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from api import projects, artifacts, ai
+
+# Storage calls are offloaded to worker threads, so allow more of them in flight
+THREAD_POOL_SIZE = 100
+
+# Every app serves the same routers under the same prefixes
+API_ROUTERS = (
+    (projects.router, "/api/projects", "projects"),
+    (artifacts.router, "/api/artifacts", "artifacts"),
+    (ai.router, "/api/ai", "ai"),
+)
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson instead of the stdlib json module."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Here rather than at import, so every way of serving the app (uvicorn main:app, reload and
+    # worker processes, the launchers) gets app INFO logs; a no-op if the host configured logging
+    logging.basicConfig(level=logging.INFO)
+    # AnyIO limiter covers FastAPI's own threadpool; the default executor covers asyncio.to_thread
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_POOL_SIZE
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE))
+    yield
+
+def build_app(serve_static: bool = False, title: str = "SEALMit API") -> FastAPI:
+    """Create the FastAPI app with the API routers, optionally serving the built frontend."""
+    app = FastAPI(title=title, lifespan=lifespan, default_response_class=ORJSONResponse)
+    for router, prefix, tag in API_ROUTERS:
+        app.include_router(router, prefix=prefix, tags=[tag])
+
+    if not serve_static:
+        @app.get("/")
+        async def root():
+            return {"message": "Engineering Lifecycle Management API"}
+        return app
+
+    # Imported here so the API-only app never loads the static file machinery
+    from static_files import SPAStaticFiles, frontend_dist
+    if os.path.exists(frontend_dist):
+        # Mounted after the API routers so /api paths still reach them; files go out via FileResponse (sendfile/pathsend)
+        app.mount("/", SPAStaticFiles(directory=frontend_dist, html=True), name="spa")
+    else:
+        @app.get("/")
+        def root():
+            return {"message": "Frontend not built. Please run 'npm run build' in frontend directory."}
+    return app
+
+def make_server(app: FastAPI, host: str, port: int, log_level: str = "info") -> uvicorn.Server:
+    """Build a uvicorn server for an app.
+
+    "auto" picks uvloop and httptools when they are installed (uvloop isn't on Windows)
+    and falls back to asyncio and h11 otherwise.
+    """
+    config = uvicorn.Config(app, host=host, port=port, log_level=log_level, loop="auto", http="auto")
+    return uvicorn.Server(config)
@@ -0,0 +1,57 @@
+"""
+Benchmark for the artifact load: serial reads vs reads overlapped on the thread pool.
+
+Times a cold parse (empty parse cache) of N artifact files read one after
+another, and with the reads on a pool of --workers threads, as storage.py
+does from PARALLEL_LOAD_THRESHOLD files on multi-core hosts.
+
+    python bench_load.py [--workers N] [sizes...]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import storage
+from models import ProjectConfig, ProjectState, Requirement, RequirementLevel
+
+
+def make_project(root: str, count: int) -> storage.GitStorage:
+    project = storage.GitStorage(os.path.join(root, f"bench-{count}"))
+    state = ProjectState(config=ProjectConfig(name="Bench", levels=[RequirementLevel(name="User")]),
+                         artifacts={}, traces=[])
+    for i in range(count):
+        state.set_artifact(Requirement(id=f"REQ-{i}", title=f"Requirement {i}", level="User",
+                                       description="The system shall do something measurable. " * 4))
+    project.save_draft(state)
+    return project
+
+
+def time_load(project: storage.GitStorage, pool) -> float:
+    storage._parsed_cache.clear()
+    storage._load_pool = pool
+    start = time.perf_counter()
+    project._load_artifact_files(project._scan_artifact_files())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument("sizes", type=int, nargs="*", default=[200, 1000, 5000, 20000])
+    args = parser.parse_args()
+
+    print(f"cpu_count={os.cpu_count()} workers={args.workers}")
+    print(f"{'files':>8} {'serial':>9} {'threaded':>9}")
+    storage.PARALLEL_LOAD_THRESHOLD = 0
+    with tempfile.TemporaryDirectory() as root, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for count in args.sizes:
+            project = make_project(root, count)
+            # Best of three, so one slow run (page cache, GC) doesn't decide the comparison
+            serial = min(time_load(project, None) for _ in range(3))
+            threaded = min(time_load(project, pool) for _ in range(3))
+            print(f"{count:>8} {serial:>8.3f}s {threaded:>8.3f}s")
+
+if __name__ == "__main__":
+    main()
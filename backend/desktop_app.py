@@ -2,15 +2,15 @@ import webview
 import threading
 import sys
 import os
-import uvicorn
-from asig_server import app
-
-def start_server():
-    uvicorn.run(app, host="127.0.0.1", port=8080, log_level="error")
+from app_factory import build_app, make_server
 
 if __name__ == '__main__':
+    # Server.run() creates its own event loop on the calling thread and only installs
+    # signal handlers on the main thread, so it is safe to run from a worker thread
+    server = make_server(build_app(serve_static=True, title="SEALMit - ASIG Server"), "127.0.0.1", 8080, log_level="error")
+
     # Start the server in a separate thread
-    t = threading.Thread(target=start_server)
+    t = threading.Thread(target=server.run)
     t.daemon = True
     t.start()
 
@@ -19,3 +19,7 @@ if __name__ == '__main__':
     
     # Start the GUI loop
     webview.start()
+
+    # Window closed: let the server shut down cleanly
+    server.should_exit = True
+    t.join(timeout=5)
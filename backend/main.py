@@ -1,8 +1,7 @@
-from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api import projects, artifacts, ai
+from app_factory import build_app
 
-app = FastAPI(title="SEALMit API")
+app = build_app(serve_static=False)
 
 # Configure CORS
 app.add_middleware(
@@ -13,11 +12,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(projects.router, prefix="/api/projects", tags=["projects"])
-app.include_router(artifacts.router, prefix="/api/artifacts", tags=["artifacts"])
-app.include_router(ai.router, prefix="/api/ai", tags=["ai"])
-
-@app.get("/")
-async def root():
-    return {"message": "Engineering Lifecycle Management API"}
+if __name__ == "__main__":
+    import os
+    import uvicorn
+    # Production launcher: one event loop per worker process; workers only share the projects on disk.
+    # uvloop/httptools are picked up automatically when installed.
+    uvicorn.run(
+        "main:app",
+        host=os.environ.get("UVICORN_HOST", "0.0.0.0"),
+        port=int(os.environ.get("UVICORN_PORT", "8000")),
+        workers=int(os.environ.get("UVICORN_WORKERS", "4")),
+    )
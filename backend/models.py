@@ -1,8 +1,17 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import Annotated, List, Literal, NamedTuple, Optional, Dict, Any, Union, Set, Tuple
+from collections import defaultdict
 from enum import Enum
-from pydantic import BaseModel, Field
-import uuid
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+import os
+from datetime import datetime, timezone
+
+def new_id() -> str:
+    """Random 128-bit artifact ID as 32 hex characters, without building a UUID object."""
+    return os.urandom(16).hex()
+
+def utc_now() -> datetime:
+    """Current time as an aware UTC datetime."""
+    return datetime.now(timezone.utc)
 
 class TraceType(str, Enum):
     SATISFIES = "satisfies"
@@ -23,27 +32,38 @@ class Trace(BaseModel):
     description: Optional[str] = None
 
 class BaseArtifact(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(defer_build=True)
+
+    id: str = Field(default_factory=new_id)
     type: ArtifactType
     title: str
     description: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
     attributes: Dict[str, Any] = Field(default_factory=dict)
 
+    @model_validator(mode="before")
+    @classmethod
+    def _default_timestamps(cls, data: Any) -> Any:
+        # One clock read for both timestamps instead of one per default factory
+        if isinstance(data, dict) and ("created_at" not in data or "updated_at" not in data):
+            now = utc_now()
+            data = {"created_at": now, "updated_at": now, **data}
+        return data
+
 class Requirement(BaseArtifact):
-    type: ArtifactType = ArtifactType.REQUIREMENT
+    type: Literal[ArtifactType.REQUIREMENT] = ArtifactType.REQUIREMENT
     level: str  # e.g., "User", "System", "Performance"
     parent_id: Optional[str] = None  # Deprecated, kept for backward compatibility
     parent_ids: List[str] = Field(default_factory=list)  # Multiple parents support
     justification: Optional[str] = None  # Rationale for the requirement
 
 class RiskHazard(BaseArtifact):
-    type: ArtifactType = ArtifactType.RISK_HAZARD
+    type: Literal[ArtifactType.RISK_HAZARD] = ArtifactType.RISK_HAZARD
     severity: Optional[str] = None
 
 class RiskCause(BaseArtifact):
-    type: ArtifactType = ArtifactType.RISK_CAUSE
+    type: Literal[ArtifactType.RISK_CAUSE] = ArtifactType.RISK_CAUSE
     probability: Optional[str] = None
 
 class VerificationMethod(str, Enum):
@@ -52,12 +72,24 @@ class VerificationMethod(str, Enum):
     REVIEW = "review"
 
 class VerificationActivity(BaseArtifact):
-    type: ArtifactType = ArtifactType.VERIFICATION_ACTIVITY
+    type: Literal[ArtifactType.VERIFICATION_ACTIVITY] = ArtifactType.VERIFICATION_ACTIVITY
     method: VerificationMethod
     procedure: Optional[str] = None
     setup: Optional[str] = None
     passed: bool = False
 
+# Any concrete artifact, dispatched on its type tag so only the matching model validates.
+# Shared by the API and ProjectState so FastAPI builds its validator once.
+ArtifactUnion = Annotated[
+    Union[Requirement, RiskHazard, RiskCause, VerificationActivity],
+    Field(discriminator="type"),
+]
+
+class ArtifactBatch(BaseModel):
+    """Artifacts created together, optionally committed under one message."""
+    artifacts: List[ArtifactUnion]
+    message: Optional[str] = None
+
 class RequirementLevel(BaseModel):
     """Requirement level with name and description."""
     name: str
@@ -76,19 +108,129 @@ class ProjectConfig(BaseModel):
     ])
     risk_matrix: Dict[str, Any] = {}
     settings: ProjectSettings = Field(default_factory=ProjectSettings)
+
+    # Derived from levels; dropped whenever levels is reassigned
+    _level_names: Optional[List[str]] = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any):
+        if name == "levels":
+            self._level_names = None
+        super().__setattr__(name, value)
     
     def get_level_names(self) -> List[str]:
-        """Get list of level names, handling both old (str) and new (RequirementLevel) formats."""
-        return [level.name if isinstance(level, RequirementLevel) else level for level in self.levels]
+        """Get list of level names, handling both old (str) and new (RequirementLevel) formats.
+
+        The list is cached until levels is reassigned; callers must not modify it.
+        """
+        if self._level_names is None:
+            self._level_names = [level.name if isinstance(level, RequirementLevel) else level for level in self.levels]
+        return self._level_names
     
     def get_top_level_name(self) -> Optional[str]:
         """Get the name of the top-level requirement level."""
-        if self.levels:
-            first_level = self.levels[0]
-            return first_level.name if isinstance(first_level, RequirementLevel) else first_level
-        return None
+        level_names = self.get_level_names()
+        return level_names[0] if level_names else None
+
+class PendingChanges(NamedTuple):
+    """What save_draft has to write for a ProjectState."""
+    full: bool  # Write everything, e.g. for a state that was never loaded from disk
+    artifacts: Set[str]  # IDs of added or updated artifacts
+    deleted: Set[str]  # IDs of removed artifacts
+    traces: bool  # Whether the trace list changed
 
 class ProjectState(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     config: ProjectConfig
-    artifacts: Dict[str, Union[Requirement, RiskHazard, RiskCause, VerificationActivity, BaseArtifact]]
+    artifacts: Dict[str, ArtifactUnion]
     traces: List[Trace]
+
+    # Changes since the state was loaded or last saved
+    _full_save: bool = PrivateAttr(default=True)
+    _dirty_artifacts: Set[str] = PrivateAttr(default_factory=set)
+    _deleted_artifacts: Set[str] = PrivateAttr(default_factory=set)
+    _dirty_traces: bool = PrivateAttr(default=False)
+
+    # Trace lookups, built on first use; keep them valid by changing traces through the methods below
+    _trace_keys: Optional[Set[Tuple[str, str, TraceType]]] = PrivateAttr(default=None)
+    _traces_by_artifact: Optional[Dict[str, List[Trace]]] = PrivateAttr(default=None)
+
+    def _trace_index(self) -> Tuple[Set[Tuple[str, str, TraceType]], Dict[str, List[Trace]]]:
+        if self._trace_keys is None:
+            keys = set()
+            by_artifact = defaultdict(list)
+            for trace in self.traces:
+                keys.add((trace.source_id, trace.target_id, trace.type))
+                by_artifact[trace.source_id].append(trace)
+                if trace.target_id != trace.source_id:
+                    by_artifact[trace.target_id].append(trace)
+            self._trace_keys = keys
+            self._traces_by_artifact = by_artifact
+        return self._trace_keys, self._traces_by_artifact
+
+    def pending_changes(self) -> PendingChanges:
+        """Get the changes that have not been saved yet."""
+        return PendingChanges(self._full_save, self._dirty_artifacts, self._deleted_artifacts, self._dirty_traces)
+
+    def mark_clean(self):
+        """Record that the state matches what is on disk."""
+        self._full_save = False
+        self._dirty_artifacts = set()
+        self._deleted_artifacts = set()
+        self._dirty_traces = False
+
+    def set_artifact(self, artifact: BaseArtifact):
+        """Add or replace an artifact."""
+        self.artifacts[artifact.id] = artifact
+        self._dirty_artifacts.add(artifact.id)
+        self._deleted_artifacts.discard(artifact.id)
+
+    def delete_artifact(self, artifact_id: str) -> List[Trace]:
+        """Remove an artifact with all of its traces and return the removed traces."""
+        del self.artifacts[artifact_id]
+        self._dirty_artifacts.discard(artifact_id)
+        self._deleted_artifacts.add(artifact_id)
+        return self.remove_artifact_traces(artifact_id)
+
+    def has_trace(self, trace: Trace) -> bool:
+        """Check whether a trace with the same source, target and type exists."""
+        keys, _ = self._trace_index()
+        return (trace.source_id, trace.target_id, trace.type) in keys
+
+    def add_trace(self, trace: Trace):
+        """Append a trace and index it."""
+        keys, by_artifact = self._trace_index()
+        self.traces.append(trace)
+        self._dirty_traces = True
+        keys.add((trace.source_id, trace.target_id, trace.type))
+        by_artifact[trace.source_id].append(trace)
+        if trace.target_id != trace.source_id:
+            by_artifact[trace.target_id].append(trace)
+
+    def remove_artifact_traces(self, artifact_id: str) -> List[Trace]:
+        """Remove every trace that starts or ends at an artifact and return them."""
+        keys, by_artifact = self._trace_index()
+        removed = by_artifact.pop(artifact_id, [])
+        if not removed:
+            return removed
+        self._dirty_traces = True
+        for trace in removed:
+            keys.discard((trace.source_id, trace.target_id, trace.type))
+            other_id = trace.target_id if trace.source_id == artifact_id else trace.source_id
+            other_traces = by_artifact.get(other_id)
+            if other_traces:
+                for i, t in enumerate(other_traces):
+                    if t is trace:
+                        del other_traces[i]
+                        break
+        # Compact the trace list in place rather than building a new one
+        # (get_project streams from its own snapshot, so nothing reads this list meanwhile)
+        removed_ids = {id(trace) for trace in removed}
+        traces = self.traces
+        kept = 0
+        for trace in traces:
+            if id(trace) not in removed_ids:
+                traces[kept] = trace
+                kept += 1
+        del traces[kept:]
+        return removed
@@ -0,0 +1,129 @@
+import os
+import time
+import hashlib
+import logging
+import mimetypes
+from typing import Dict, Optional, Tuple
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+logger = logging.getLogger(__name__)
+
+# Go up one level from backend/ to root, then into frontend/dist
+frontend_dist = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "dist")
+
+# How often, at most, the dist tree is checked for a rebuild
+MANIFEST_RECHECK_SECONDS = 1.0
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _hash_file(path: str) -> str:
+    """Content-hash ETag for a file, quoted as sent on the wire."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return f'"{h.hexdigest()}"'
+
+class SPAStaticFiles(StaticFiles):
+    """StaticFiles that serves a fixed manifest of the build output and falls back to index.html."""
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self._build_manifest()
+
+        # (mtime, body, headers) for index.html, which answers every client-side route
+        self._index: Optional[Tuple[float, bytes, Dict[str, str]]] = None
+
+    def _build_manifest(self):
+        # Relative URL -> (absolute path, etag); only whitelisted files are ever served.
+        # A flat dict resolves any path in one hash lookup, whatever the depth or size of the tree.
+        manifest: Dict[str, Tuple[str, str]] = {}
+        dir_mtimes: Dict[str, int] = {}
+        for root, _, files in os.walk(self.directory):
+            dir_mtimes[root] = os.stat(root).st_mtime_ns
+            for name in files:
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                manifest[rel_path] = (full_path, _hash_file(full_path))
+        self.manifest = manifest
+        self._dir_mtimes = dir_mtimes
+        self._checked_at = time.monotonic()
+
+    def _refresh_manifest(self):
+        """Rebuild the manifest if a rebuild of dist added, removed or replaced files."""
+        now = time.monotonic()
+        if now - self._checked_at < MANIFEST_RECHECK_SECONDS:
+            return
+        self._checked_at = now
+        for root, mtime in self._dir_mtimes.items():
+            try:
+                changed = os.stat(root).st_mtime_ns != mtime
+            except FileNotFoundError:
+                changed = True
+            if changed:
+                logger.info("Frontend build changed, rebuilding static manifest")
+                self._index = None
+                self._build_manifest()
+                return
+
+    @staticmethod
+    def _client_has(etag: str, scope) -> bool:
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        return bool(if_none_match) and etag in {tag.strip() for tag in if_none_match.split(",")}
+
+    def _file_response(self, key: str, scope) -> Response:
+        full_path, etag = self.manifest[key]
+        headers = {}
+        media_type = None
+        if key.startswith("assets/"):
+            # Vite content-hashes asset filenames, so a given URL never changes
+            headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if key + ".br" in self.manifest or key + ".gz" in self.manifest:
+            # Prefer a precompressed sibling written by the frontend build
+            headers["vary"] = "accept-encoding"
+            accept = Headers(scope=scope).get("accept-encoding", "")
+            accepted = {part.split(";")[0].strip() for part in accept.split(",")}
+            for suffix, encoding in ((".br", "br"), (".gz", "gzip")):
+                if encoding in accepted and key + suffix in self.manifest:
+                    full_path, etag = self.manifest[key + suffix]
+                    headers["content-encoding"] = encoding
+                    media_type = mimetypes.guess_type(key)[0]
+                    break
+        headers["etag"] = etag
+        # Return a 304 if the client already holds the current content
+        if self._client_has(etag, scope):
+            headers.pop("content-encoding", None)
+            return Response(status_code=304, headers=headers)
+        return FileResponse(full_path, headers=headers, media_type=media_type)
+
+    def _index_response(self, scope) -> Response:
+        """Serve index.html from memory, reloading it only when its mtime changes."""
+        index_path = os.path.join(self.directory, "index.html")
+        mtime = os.stat(index_path).st_mtime
+        if self._index is None or self._index[0] != mtime:
+            with open(index_path, "rb") as f:
+                body = f.read()
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            headers = {"content-type": "text/html; charset=utf-8", "etag": etag, "cache-control": "no-cache"}
+            self._index = (mtime, body, headers)
+            self.manifest["index.html"] = (index_path, etag)
+        _, body, headers = self._index
+        if self._client_has(headers["etag"], scope):
+            return Response(status_code=304, headers={"etag": headers["etag"]})
+        return Response(body, headers=headers)
+
+    async def get_response(self, path: str, scope):
+        if scope["method"] not in ("GET", "HEAD"):
+            raise StarletteHTTPException(status_code=405)
+        self._refresh_manifest()
+        key = "index.html" if path == "." else path.replace(os.sep, "/")
+        if key == "index.html":
+            return self._index_response(scope)
+        if key in self.manifest:
+            return self._file_response(key, scope)
+        # If it's an API call that wasn't caught by the routers (shouldn't happen usually but good safety)
+        if key.startswith("api/") or key == "api":
+            return JSONResponse({"error": "API path not found"}, status_code=404)
+        # Default to index.html for client-side routing
+        return self._index_response(scope)
@@ -1,52 +1,651 @@
 import os
+import re
+import json
+import uuid
+import asyncio
+import hashlib
+import shutil
 import logging
+import threading
+import subprocess
 import git
-import xml.etree.ElementTree as ET
-from typing import Optional, Dict, List
-from models import ProjectState, ProjectConfig, BaseArtifact, Trace, ArtifactType, Requirement, RiskHazard, RiskCause, VerificationActivity, VerificationMethod, RequirementLevel, ProjectSettings
+from git.index.typ import BaseIndexEntry
+from lxml import etree as ET
+from pydantic import TypeAdapter
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from models import ProjectState, ProjectConfig, BaseArtifact, Trace, TraceType, ArtifactType, Requirement, RiskHazard, RiskCause, VerificationActivity, VerificationMethod, RequirementLevel, ProjectSettings, ArtifactUnion, utc_now
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(fh):
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(fh):
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(fh):
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(fh):
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+class ProjectFileLock:
+    """Exclusive lock on a project repository, shared by all server processes.
+
+    Not reentrant: acquiring it twice from the same process deadlocks.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+
+    def acquire(self):
+        fh = open(self.path, "a+b")
+        try:
+            _lock_file(fh)
+        except Exception:
+            fh.close()
+            raise
+        self._fh = fh
+
+    def release(self):
+        try:
+            _unlock_file(self._fh)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+# Parsed project states shared by every GitStorage in this process, keyed by
+# project path and validated against the on-disk signature before reuse.
+STATE_CACHE_SIZE = 64
+_state_cache: "OrderedDict[str, Tuple[tuple, ProjectState]]" = OrderedDict()
+_state_cache_lock = threading.Lock()
+_state_load_locks: Dict[str, threading.Lock] = {}
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Characters libxml2 refuses to serialize; rejected up front so no unreadable file is written
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+def _escape_text(text: str) -> str:
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\r", "&#13;")
+
+@lru_cache(maxsize=4096)
+def _render_element(tag: str, text: str) -> str:
+    """Escape and wrap a low-cardinality value once, for fields that repeat across artifacts."""
+    return "<" + tag + ">" + _escape_text(text) + "</" + tag + ">"
+
+# Newline plus indentation for each nesting depth; the project files never go deeper than this
+_INDENTS = tuple("\n" + "  " * depth for depth in range(8))
+
+class _XMLWriter:
+    """Streams a pretty-printed XML document without building an element tree.
+
+    Produces the same bytes as lxml's tostring(pretty_print=True) for the
+    text-only elements used in the project files.
+    """
+    __slots__ = ("_parts", "_depth", "_open")
+
+    def __init__(self, root_tag: str):
+        self._parts = ["<?xml version='1.0' encoding='utf-8'?>\n<", root_tag, ">"]
+        self._depth = 1
+        self._open = True
+
+    def start(self, tag: str):
+        self._parts.append(f"{_INDENTS[self._depth]}<{tag}>")
+        self._depth += 1
+        self._open = True
+
+    def end(self, tag: str):
+        self._depth -= 1
+        if self._open:
+            # No children: collapse to an empty element, as lxml does
+            self._parts[-1] = self._parts[-1][:-1] + "/>"
+        else:
+            self._parts.append(f"{_INDENTS[self._depth]}</{tag}>")
+        self._open = False
+
+    def element(self, tag: str, text: Optional[str]):
+        if text is None:
+            self._parts.append(f"{_INDENTS[self._depth]}<{tag}/>")
+        else:
+            self._parts.append(f"{_INDENTS[self._depth]}<{tag}>{_escape_text(text)}</{tag}>")
+        self._open = False
+
+    def repeated_element(self, tag: str, text: Optional[str]):
+        """Like element, for values such as types and levels that recur across documents."""
+        if text is None:
+            self.element(tag, text)
+        else:
+            self._parts.append(_INDENTS[self._depth] + _render_element(tag, text))
+            self._open = False
+
+    def getvalue(self, root_tag: str) -> bytes:
+        self.end(root_tag)
+        self._parts.append("\n")
+        return "".join(self._parts).encode("utf-8")
+
+def _xml_bytes(root) -> bytes:
+    """Serialize an element tree in libxml2."""
+    return ET.tostring(root, pretty_print=True, xml_declaration=True, encoding="utf-8")
+
+def _write_file(path: str, data: bytes) -> None:
+    """Write bytes straight to the file descriptor, skipping the buffered file object."""
+    view = memoryview(data)
+    fd = os.open(path, _WRITE_FLAGS, 0o666)
+    try:
+        # One write covers these small documents
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+# Value -> member lookups for the enums parsed on every load, cheaper than calling the Enum class
+_ARTIFACT_TYPES = {member.value: member for member in ArtifactType}
+_TRACE_TYPES = {member.value: member for member in TraceType}
+_VERIFICATION_METHODS = {member.value: member for member in VerificationMethod}
+
+def _requirement_from_xml(root, fields: Dict[str, Optional[str]], common: Dict[str, Any]) -> Requirement:
+    # Load parent IDs (support both old parent_id and new parent_ids)
+    parent_ids = []
+    parent_id = None
+    if "ParentIDs" in fields:
+        # New format (ParentIDs)
+        parent_ids = [p.text for p in root.iterfind("ParentIDs/ParentID")]
+    elif "ParentID" in fields:
+        # Old format (ParentID)
+        parent_id = fields["ParentID"]
+        parent_ids = [parent_id] if parent_id else []
+    return Requirement.model_construct(
+        **common,
+        level=fields["Level"] or "",
+        parent_id=parent_id,
+        parent_ids=parent_ids,
+        justification=fields.get("Justification")
+    )
+
+def _risk_hazard_from_xml(root, fields: Dict[str, Optional[str]], common: Dict[str, Any]) -> RiskHazard:
+    return RiskHazard.model_construct(**common, severity=fields.get("Severity"))
+
+def _risk_cause_from_xml(root, fields: Dict[str, Optional[str]], common: Dict[str, Any]) -> RiskCause:
+    return RiskCause.model_construct(**common, probability=fields.get("Probability"))
+
+def _verification_activity_from_xml(root, fields: Dict[str, Optional[str]], common: Dict[str, Any]) -> VerificationActivity:
+    return VerificationActivity.model_construct(
+        **common,
+        method=_VERIFICATION_METHODS[fields["Method"]],
+        procedure=fields.get("Procedure"),
+        setup=fields.get("Setup"),
+        passed=fields["Passed"] == "True"
+    )
+
+_ARTIFACT_READERS = {
+    ArtifactType.REQUIREMENT: _requirement_from_xml,
+    ArtifactType.RISK_HAZARD: _risk_hazard_from_xml,
+    ArtifactType.RISK_CAUSE: _risk_cause_from_xml,
+    ArtifactType.VERIFICATION_ACTIVITY: _verification_activity_from_xml,
+}
+
+def _artifact_from_xml(root, loaded_at: datetime) -> Optional[BaseArtifact]:
+    """Build an artifact from its XML element, reading each child element once.
+
+    The files are written by save_draft, so models are built with model_construct and
+    skip validation; full validation stays at the API boundary.
+    """
+    fields = {child.tag: child.text for child in root}
+    reader = _ARTIFACT_READERS.get(_ARTIFACT_TYPES[fields["Type"]])
+    if reader is None:
+        return None
+    # An empty element reads back as None; required strings come back as ""
+    common = {
+        "id": fields["ID"], "title": fields["Title"] or "", "description": fields.get("Description"),
+        # Timestamps aren't persisted; share one precomputed value instead of running the default factories
+        "created_at": loaded_at, "updated_at": loaded_at,
+    }
+    return reader(root, fields, common)
+
+_get_trace_fields = attrgetter("source_id", "target_id", "type", "description")
+
+# Enum member -> XML text; Enum.value is a Python-level descriptor, about 3x the cost of this lookup
+_ENUM_TEXT = {member: member.value for enum in (ArtifactType, TraceType, VerificationMethod) for member in enum}
+
+# Elements of each artifact file after ID, Type, Title and Description, as (tag, attribute, kind):
+#   text               always written; None becomes an empty element
+#   optional           written only when truthy
+#   repeated           like text, through the _render_element cache for low-cardinality values
+#   repeated_optional  like optional, through the _render_element cache
+#   enum               an enum member, always written
+#   bool               written as True/False
+#   parents            the ParentIDs list, or the legacy single ParentID (attribute parent_id) when it is empty
+_ARTIFACT_LAYOUTS = {
+    BaseArtifact: (),
+    Requirement: (
+        ("Level", "level", "repeated"),
+        ("ParentIDs", "parent_ids", "parents"),
+        ("Justification", "justification", "optional"),
+    ),
+    RiskHazard: (("Severity", "severity", "repeated_optional"),),
+    RiskCause: (("Probability", "probability", "repeated_optional"),),
+    VerificationActivity: (
+        ("Method", "method", "enum"),
+        ("Procedure", "procedure", "optional"),
+        ("Setup", "setup", "optional"),
+        ("Passed", "passed", "bool"),
+    ),
+}
+
+def _compile_serializer(cls: type, layout: tuple):
+    """Generate a function that renders one artifact of exactly this class to file bytes.
+
+    The layout is fixed per class, so the element order, the constant Type element and
+    the indentation are baked into straight-line code instead of being decided per artifact.
+    The output matches what _XMLWriter produces for the same elements.
+    """
+    type_default = cls.model_fields["type"].default
+    fields = [("ID", "id", "text")]
+    if isinstance(type_default, ArtifactType):
+        # Concrete classes pin their type with a Literal, so the element is a constant
+        fields.append(("Type", None, "const:" + _render_element("Type", type_default.value)))
+    else:
+        fields.append(("Type", "type", "enum"))
+    fields += [("Title", "title", "text"), ("Description", "description", "optional"), *layout]
+
+    attrs = []
+    lines = [f"def _serialize(artifact):"]
+    unpack_at = len(lines)
+    lines.append("    parts = [\"<?xml version='1.0' encoding='utf-8'?>\\n<Artifact>\"]")
+    lines.append("    append = parts.append")
+    for tag, attr, kind in fields:
+        if attr is not None:
+            attrs.append(attr)
+        var = f"v{len(attrs) - 1}"
+        indent, empty = "\n  ", f"\n  <{tag}/>"
+        opening, closing = f"{indent}<{tag}>", f"</{tag}>"
+        if kind.startswith("const:"):
+            lines.append(f"    append({indent + kind[6:]!r})")
+        elif kind == "text":
+            lines.append(f"    append({empty!r} if {var} is None else {opening!r} + _escape_text({var}) + {closing!r})")
+        elif kind == "optional":
+            lines.append(f"    if {var}:")
+            lines.append(f"        append({opening!r} + _escape_text({var}) + {closing!r})")
+        elif kind == "repeated":
+            lines.append(f"    append({empty!r} if {var} is None else {indent!r} + _render_element({tag!r}, {var}))")
+        elif kind == "repeated_optional":
+            lines.append(f"    if {var}:")
+            lines.append(f"        append({indent!r} + _render_element({tag!r}, {var}))")
+        elif kind == "enum":
+            lines.append(f"    append({indent!r} + _render_element({tag!r}, _ENUM_TEXT[{var}]))")
+        elif kind == "bool":
+            lines.append(f"    append({opening + 'True' + closing!r} if {var} else {opening + 'False' + closing!r})")
+        elif kind == "parents":
+            attrs.append("parent_id")
+            legacy = f"v{len(attrs) - 1}"
+            child_indent = indent + "  "
+            lines += [
+                f"    if {var}:",
+                f"        append({opening!r})",
+                f"        for parent_id in {var}:",
+                f"            append({child_indent + '<ParentID/>'!r} if parent_id is None"
+                f" else {child_indent + '<ParentID>'!r} + _escape_text(parent_id) + '</ParentID>')",
+                f"        append({indent + '</' + tag + '>'!r})",
+                f"    elif {legacy}:",
+                f"        append({indent + '<ParentID>'!r} + _escape_text({legacy}) + '</ParentID>')",
+            ]
+        else:
+            raise ValueError(f"Unknown field kind {kind!r} for {cls.__name__}.{tag}")
+    lines.insert(unpack_at, "    " + "".join(f"v{i}, " for i in range(len(attrs))) + "= _get_fields(artifact)")
+    lines.append("    append(\"\\n</Artifact>\\n\")")
+    lines.append("    return \"\".join(parts).encode(\"utf-8\")")
+
+    namespace = {
+        "_escape_text": _escape_text, "_render_element": _render_element, "_ENUM_TEXT": _ENUM_TEXT,
+        "_get_fields": attrgetter(*attrs) if len(attrs) > 1 else (lambda artifact: (getattr(artifact, attrs[0]),)),
+    }
+    exec(compile("\n".join(lines), f"<serializer for {cls.__name__}>", "exec"), namespace)
+    serialize = namespace["_serialize"]
+    serialize.__name__ = serialize.__qualname__ = f"_serialize_{cls.__name__}"
+    return serialize
+
+# One generated serializer per exact artifact class, looked up instead of an isinstance ladder
+_ARTIFACT_SERIALIZERS = {cls: _compile_serializer(cls, layout) for cls, layout in _ARTIFACT_LAYOUTS.items()}
+
+def serialize_artifact(artifact: BaseArtifact) -> bytes:
+    """Render an artifact's XML file, raising ValueError for content XML can't hold."""
+    serialize = _ARTIFACT_SERIALIZERS.get(type(artifact)) or _ARTIFACT_SERIALIZERS[BaseArtifact]
+    return serialize(artifact)
+
+# Version of the artifact shard format; bump to invalidate shards written by older code
+SHARD_VERSION = 2
+_ARTIFACTS_ADAPTER = TypeAdapter(Dict[str, ArtifactUnion])
+
+def _parse_artifact_files(paths: List[str], loaded_at: datetime) -> List[Optional[BaseArtifact]]:
+    """Read and parse artifact files one after another."""
+    # libxml2 reads the file itself, which beats read() + fromstring for a serial load.
+    # Each tree is freed as soon as its artifact is built, so at most one is alive at a time;
+    # iterparse would only pay off for the single large document, traces.xml, and is used there.
+    return [_artifact_from_xml(ET.parse(path).getroot(), loaded_at) for path in paths]
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+# Large loads read their files on a shared thread pool so the reads overlap (the GIL is released
+# during I/O); parsing stays on the calling thread, since it is GIL-bound. A process pool was
+# tried and lost at every measured size (bench_load.py). A single-core host gains nothing here.
+PARALLEL_LOAD_THRESHOLD = 16
+_LOAD_WORKERS = min(8, os.cpu_count() or 1)
+_load_pool = ThreadPoolExecutor(max_workers=_LOAD_WORKERS, thread_name_prefix="sealmit-load") if _LOAD_WORKERS > 1 else None
+
+class CommitInfo(NamedTuple):
+    """One history entry, parsed from git log output."""
+    sha: str
+    author: str
+    email: str
+    timestamp: int  # Seconds since the epoch
+    summary: str
+
+# Separators for git log --pretty output (ASCII unit and record separators)
+_FIELD_SEP = "\x1f"
+_RECORD_SEP = "\x1e"
+
+# Index mode for the files staged from _hash_objects
+REGULAR_FILE_MODE = 0o100644
+
+# Parsed artifacts by file path, reused while the file's (mtime_ns, size) is unchanged.
+# Artifacts are replaced rather than mutated in place, so entries can be shared between states.
+PARSED_CACHE_SIZE = 20000
+_parsed_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_parsed_cache_lock = threading.Lock()
+
 class GitStorage:
     def __init__(self, project_path: str):
         """Initialize Git storage for a project."""
         self.project_path = project_path
         self.artifacts_path = os.path.join(project_path, "artifacts")
+        # State whose save is deferred while a batch is open (see begin_batch)
+        self._batching = False
+        self._batch_state: Optional[ProjectState] = None
         try:
             os.makedirs(self.artifacts_path, exist_ok=True)
             self.repo = self._init_repo()
-            logger.info(f"Initialized GitStorage for project at {project_path}")
+            logger.debug("Initialized GitStorage for project at %s", project_path)
         except Exception as e:
-            logger.error(f"Failed to initialize GitStorage at {project_path}: {str(e)}")
+            logger.error("Failed to initialize GitStorage at %s: %s", project_path, e)
             raise
 
     def _init_repo(self) -> git.Repo:
         """Initialize or open Git repository."""
         try:
             if not os.path.exists(os.path.join(self.project_path, ".git")):
-                logger.info(f"Creating new Git repository at {self.project_path}")
+                logger.info("Creating new Git repository at %s", self.project_path)
                 repo = git.Repo.init(self.project_path)
                 # Create initial commit
                 readme_path = os.path.join(self.project_path, "README.md")
                 with open(readme_path, "w") as f:
                     f.write("# Engineering Project")
-                repo.index.add([readme_path])
+                # git add runs with cwd set, where index.add would chdir the whole process
+                repo.git.add("README.md")
                 repo.index.commit("Initial commit")
+                # Start with an empty journal so commits stage only what save_draft wrote
+                open(self._pending_path(), "w").close()
                 logger.info("Created initial Git commit")
                 return repo
             else:
-                logger.info(f"Opening existing Git repository at {self.project_path}")
+                logger.debug("Opening existing Git repository at %s", self.project_path)
                 return git.Repo(self.project_path)
         except Exception as e:
-            logger.error(f"Failed to initialize Git repository: {str(e)}")
+            logger.error("Failed to initialize Git repository: %s", e)
             raise
 
+    def file_lock(self) -> ProjectFileLock:
+        """Get the cross-process lock for this project.
+
+        The lock file lives inside .git so it is never picked up by a commit.
+        """
+        return ProjectFileLock(os.path.join(self.project_path, ".git", "sealmit.lock"))
+
+    def _generation_path(self) -> str:
+        return os.path.join(self.project_path, ".git", "sealmit-generation")
+
+    def _bump_generation(self):
+        """Record that the working tree changed, so other processes drop their cached state."""
+        with open(self._generation_path(), "w") as f:
+            f.write(uuid.uuid4().hex)
+
+    def _read_generation(self) -> Optional[str]:
+        try:
+            with open(self._generation_path()) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _head_sha(self) -> Optional[str]:
+        """Commit HEAD points at, read from the ref files (repo.head.commit is ~10x slower)."""
+        git_dir = os.path.join(self.project_path, ".git")
+        try:
+            with open(os.path.join(git_dir, "HEAD")) as f:
+                head = f.read().strip()
+            if not head.startswith("ref: "):
+                return head  # Detached HEAD
+            ref = head[5:]
+            try:
+                with open(os.path.join(git_dir, ref)) as f:
+                    return f.read().strip()
+            except FileNotFoundError:
+                with open(os.path.join(git_dir, "packed-refs")) as f:
+                    for line in f:
+                        if line.endswith(" " + ref + "\n"):
+                            return line.split(" ", 1)[0]
+        except FileNotFoundError:
+            pass
+        return None  # No commits yet
+
+    def _shard_path(self) -> str:
+        return os.path.join(self.project_path, ".git", "sealmit-artifacts.jsonl")
+
+    def _scan_artifact_files(self) -> List[tuple]:
+        """(path, (mtime_ns, size), inode) for every artifact XML file, from one directory pass."""
+        entries = []
+        try:
+            with os.scandir(self.artifacts_path) as it:
+                for entry in it:
+                    if entry.name.endswith(".xml") and entry.is_file():
+                        st = entry.stat()
+                        entries.append((entry.path, (st.st_mtime_ns, st.st_size), st.st_ino))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @staticmethod
+    def _stamps_digest(entries: List[tuple]) -> str:
+        """Digest of every file's name, mtime and size; changes when any one file does."""
+        # One update over a joined string; per-file updates dominate the cost at thousands of files
+        return hashlib.blake2b("".join([
+            f"{path.rpartition(os.sep)[2]}\0{mtime_ns}\0{size}\n" for path, (mtime_ns, size), _ in sorted(entries)
+        ]).encode(), digest_size=16).hexdigest()
+
+    def _shard_key(self, entries: Optional[List[tuple]] = None) -> list:
+        """Identifies the artifact files a shard was built from."""
+        # Per-file stamps, because an in-place edit doesn't touch the directory mtime;
+        # HEAD too, because a checkout can restore a file's old size and mtime
+        if entries is None:
+            entries = self._scan_artifact_files()
+        return [self._read_generation(), self._head_sha(), self._stamps_digest(entries)]
+
+    def _write_shard(self, artifacts: Dict[str, BaseArtifact], key: list):
+        """Write all artifacts to the load shard: a header line, then the artifacts dict as one JSON document.
+
+        The per-artifact XML files stay canonical; the shard is a derived copy under
+        .git that lets a cold load read one file instead of one per artifact.
+        """
+        tmp_path = self._shard_path() + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps({"version": SHARD_VERSION, "key": key}).encode() + b"\n")
+                # Serialized in one pydantic-core call rather than per model
+                f.write(_ARTIFACTS_ADAPTER.dump_json(artifacts))
+            os.replace(tmp_path, self._shard_path())
+        except OSError as e:
+            # The shard is only an accelerator; the next load falls back to the XML files
+            logger.warning("Failed to write artifact shard for %s: %s", self.project_path, e)
+
+    def _read_shard(self, key: list) -> Optional[Dict[str, BaseArtifact]]:
+        """Artifacts from the load shard, or None if it is missing or out of date."""
+        try:
+            with open(self._shard_path(), "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("version") != SHARD_VERSION or header.get("key") != key:
+                    return None
+                return _ARTIFACTS_ADAPTER.validate_json(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _pending_path(self) -> str:
+        return os.path.join(self.project_path, ".git", "sealmit-pending")
+
+    def _record_pending(self, rel_paths: List[str]):
+        """Append paths written since the last commit to the pending journal."""
+        with open(self._pending_path(), "a", encoding="utf-8") as f:
+            f.write("".join(path + "\n" for path in rel_paths))
+
+    def _hashes_path(self) -> str:
+        return os.path.join(self.project_path, ".git", "sealmit-hashes.json")
+
+    def _load_hashes(self) -> Dict[str, list]:
+        """[content hash, mtime_ns, size] of each artifact file as last written by save_draft."""
+        try:
+            with open(self._hashes_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _store_hashes(self, hashes: Dict[str, list]):
+        _write_file(self._hashes_path(), json.dumps(hashes, separators=(",", ":")).encode())
+
+    def _drop_shard(self):
+        """Invalidate the load shard; the next load that misses the state cache rebuilds it."""
+        try:
+            os.remove(self._shard_path())
+        except FileNotFoundError:
+            pass
+
+    def _state_signature(self, entries: Optional[List[tuple]] = None) -> tuple:
+        """Cheap fingerprint of the on-disk project state."""
+        signature = [self._read_generation(), self._head_sha()]
+        for path in (os.path.join(self.project_path, "project.xml"),
+                     os.path.join(self.project_path, "traces.xml")):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        # Per-file stamps rather than the directory's, which in-place edits don't change
+        if entries is None:
+            entries = self._scan_artifact_files()
+        signature.append(self._stamps_digest(entries))
+        return tuple(signature)
+
+    def _cache_state(self, signature: tuple, state: ProjectState):
+        with _state_cache_lock:
+            _state_cache[self.project_path] = (signature, state)
+            _state_cache.move_to_end(self.project_path)
+            while len(_state_cache) > STATE_CACHE_SIZE:
+                _state_cache.popitem(last=False)
+
+    def _rekey_caches(self, entries: List[tuple], old_signature: tuple, old_key: list):
+        """Carry the cached state and shard over a commit, which moves HEAD but leaves the files as they were.
+
+        entries is the artifact scan taken before the commit, still valid since a commit writes no files.
+        """
+        with _state_cache_lock:
+            entry = _state_cache.get(self.project_path)
+            if entry is not None and entry[0] == old_signature:
+                _state_cache[self.project_path] = (self._state_signature(entries), entry[1])
+        tmp_path = self._shard_path() + ".tmp"
+        try:
+            with open(self._shard_path(), "rb") as src:
+                header = json.loads(src.readline())
+                if header.get("version") != SHARD_VERSION or header.get("key") != old_key:
+                    return
+                with open(tmp_path, "wb") as dst:
+                    dst.write(json.dumps({"version": SHARD_VERSION, "key": self._shard_key(entries)}).encode() + b"\n")
+                    shutil.copyfileobj(src, dst)
+            os.replace(tmp_path, self._shard_path())
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning("Could not update artifact shard: %s", e)
+
+    def _evict_state(self):
+        with _state_cache_lock:
+            _state_cache.pop(self.project_path, None)
+
+    def load_project_cached(self) -> ProjectState:
+        """Load project state, reusing the last parsed state while the files are unchanged.
+
+        The returned state is shared with other requests; mutate it only when
+        the change is about to be persisted with save_draft.
+        """
+        with _state_cache_lock:
+            load_lock = _state_load_locks.setdefault(self.project_path, threading.Lock())
+        with load_lock:
+            signature = self._state_signature()
+            with _state_cache_lock:
+                entry = _state_cache.get(self.project_path)
+                if entry is not None and entry[0] == signature:
+                    _state_cache.move_to_end(self.project_path)
+                    return entry[1]
+            state = self.load_project()
+            self._cache_state(signature, state)
+            return state
+
+    def begin_batch(self):
+        """Defer save_draft writes until end_batch, so many mutations cost one save and one commit."""
+        self._batching = True
+        self._batch_state = None
+
+    def end_batch(self, message: Optional[str] = None):
+        """Write the deferred draft once and, given a message, commit it."""
+        state = self._batch_state
+        self.abort_batch()
+        if state is not None:
+            self.save_draft(state)
+        if message:
+            self.commit(message)
+
+    def abort_batch(self):
+        """Leave batch mode without writing; the state keeps its unsaved changes."""
+        self._batching = False
+        self._batch_state = None
+
     def save_draft(self, state: ProjectState):
         """Save project state to XML files without committing."""
+        if self._batching:
+            # Dirty tracking accumulates on the state, so only the latest one needs saving
+            self._batch_state = state
+            return
         try:
-            logger.info(f"Saving draft for project at {self.project_path}")
+            logger.info("Saving draft for project at %s", self.project_path)
             
             # Save Project Config
             config_root = ET.Element("ProjectConfig")
@@ -68,84 +667,104 @@ class GitStorage:
             ET.SubElement(settings_elem, "EnforceSingleParent").text = str(state.config.settings.enforce_single_parent)
             ET.SubElement(settings_elem, "PreventOrphansAtLowerLevels").text = str(state.config.settings.prevent_orphans_at_lower_levels)
             
-            tree = ET.ElementTree(config_root)
-            ET.indent(tree, space="  ", level=0)
-            tree.write(os.path.join(self.project_path, "project.xml"), encoding="utf-8", xml_declaration=True)
+            # Serialize everything before touching the disk, so content that can't be written
+            # (e.g. a control character in a title) fails the save without leaving a partial draft
+            files = [("project.xml", _xml_bytes(config_root))]
+
+            changes = state.pending_changes()
 
             # Save Traces
-            traces_root = ET.Element("Traces")
-            for trace in state.traces:
-                trace_elem = ET.SubElement(traces_root, "Trace")
-                ET.SubElement(trace_elem, "SourceID").text = trace.source_id
-                ET.SubElement(trace_elem, "TargetID").text = trace.target_id
-                ET.SubElement(trace_elem, "Type").text = trace.type.value
-                if trace.description:
-                    ET.SubElement(trace_elem, "Description").text = trace.description
-            
-            tree = ET.ElementTree(traces_root)
-            ET.indent(tree, space="  ", level=0)
-            tree.write(os.path.join(self.project_path, "traces.xml"), encoding="utf-8", xml_declaration=True)
+            if changes.full or changes.traces:
+                out = _XMLWriter("Traces")
+                for source_id, target_id, trace_type, description in map(_get_trace_fields, state.traces):
+                    out.start("Trace")
+                    out.element("SourceID", source_id)
+                    out.element("TargetID", target_id)
+                    out.repeated_element("Type", _ENUM_TEXT[trace_type])
+                    if description:
+                        out.element("Description", description)
+                    out.end("Trace")
+                files.append(("traces.xml", out.getvalue("Traces")))
+
+            # Save Artifacts (only those changed since load, unless this is a full save)
+            hashes = self._load_hashes()
+            new_hashes = {}
+            saved_ids = state.artifacts.keys() if changes.full else changes.artifacts
+            # Group by model class, so each group runs one type-specific serializer with no per-artifact dispatch
+            by_type: Dict[type, List[BaseArtifact]] = defaultdict(list)
+            for artifact_id in saved_ids:
+                artifact = state.artifacts[artifact_id]
+                by_type[type(artifact)].append(artifact)
+            for artifact_type, group in by_type.items():
+                serialize = _ARTIFACT_SERIALIZERS.get(artifact_type) or _ARTIFACT_SERIALIZERS[BaseArtifact]
+                for artifact in group:
+                    data = self._serialize_artifact(artifact, serialize)
+                    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+                    # Skip files that still hold identical content; the stamp catches edits made outside the app
+                    if not self._file_matches(artifact.id, hashes.get(artifact.id), digest):
+                        files.append((f"artifacts/{artifact.id}.xml", data))
+                        new_hashes[f"artifacts/{artifact.id}.xml"] = (artifact.id, digest)
 
-            # Save Artifacts
-            for artifact in state.artifacts.values():
-                self._save_artifact(artifact)
+            # Journal each path as soon as it changes on disk, so a failure partway through
+            # still leaves every touched file for the next commit to stage
+            written = []
+            hashes_changed = False
+            try:
+                for rel_path, data in files:
+                    _write_file(os.path.join(self.project_path, rel_path), data)
+                    written.append(rel_path)
+                    if rel_path in new_hashes:
+                        artifact_id, digest = new_hashes[rel_path]
+                        st = os.stat(os.path.join(self.project_path, rel_path))
+                        hashes[artifact_id] = [digest, st.st_mtime_ns, st.st_size]
+                        hashes_changed = True
+                for artifact_id in changes.deleted:
+                    try:
+                        os.remove(os.path.join(self.artifacts_path, f"{artifact_id}.xml"))
+                    except FileNotFoundError:
+                        pass
+                    hashes.pop(artifact_id, None)
+                    hashes_changed = True
+                    written.append(f"artifacts/{artifact_id}.xml")
+            finally:
+                if written:
+                    self._record_pending(written)
+                if hashes_changed:
+                    self._store_hashes(hashes)
+            state.mark_clean()
             
-            logger.info(f"Successfully saved draft with {len(state.artifacts)} artifacts and {len(state.traces)} traces")
+            self._bump_generation()
+            # Dropping the shard keeps the save O(changed); rewriting it would serialize every artifact
+            self._drop_shard()
+            self._cache_state(self._state_signature(), state)
+            logger.debug("Successfully saved draft with %d artifacts and %d traces", len(state.artifacts), len(state.traces))
         except Exception as e:
-            logger.error(f"Failed to save draft: {str(e)}")
+            self._evict_state()
+            logger.error("Failed to save draft: %s", e)
             raise
 
-    def _save_artifact(self, artifact: BaseArtifact):
-        """Save a single artifact to XML file."""
+    def _file_matches(self, artifact_id: str, recorded: Optional[list], digest: str) -> bool:
+        """Whether an artifact's file is still exactly what save_draft last wrote with this digest."""
+        if not isinstance(recorded, list) or recorded[0] != digest:
+            return False
         try:
-            root = ET.Element("Artifact")
-            ET.SubElement(root, "ID").text = artifact.id
-            ET.SubElement(root, "Type").text = artifact.type.value
-            ET.SubElement(root, "Title").text = artifact.title
-            if artifact.description:
-                ET.SubElement(root, "Description").text = artifact.description
-            
-            # Type specific fields
-            if isinstance(artifact, Requirement):
-                ET.SubElement(root, "Level").text = artifact.level
-                
-                # Save parent IDs (support both old parent_id and new parent_ids)
-                if artifact.parent_ids:
-                    parent_ids_elem = ET.SubElement(root, "ParentIDs")
-                    for parent_id in artifact.parent_ids:
-                        ET.SubElement(parent_ids_elem, "ParentID").text = parent_id
-                elif artifact.parent_id:
-                    # Backward compatibility: save old parent_id format
-                    ET.SubElement(root, "ParentID").text = artifact.parent_id
-                
-                # Save justification if present
-                if artifact.justification:
-                    ET.SubElement(root, "Justification").text = artifact.justification
-            elif isinstance(artifact, RiskHazard):
-                if artifact.severity:
-                    ET.SubElement(root, "Severity").text = artifact.severity
-            elif isinstance(artifact, RiskCause):
-                if artifact.probability:
-                    ET.SubElement(root, "Probability").text = artifact.probability
-            elif isinstance(artifact, VerificationActivity):
-                ET.SubElement(root, "Method").text = artifact.method.value
-                if artifact.procedure:
-                    ET.SubElement(root, "Procedure").text = artifact.procedure
-                if artifact.setup:
-                    ET.SubElement(root, "Setup").text = artifact.setup
-                ET.SubElement(root, "Passed").text = str(artifact.passed)
-
-            tree = ET.ElementTree(root)
-            ET.indent(tree, space="  ", level=0)
-            tree.write(os.path.join(self.artifacts_path, f"{artifact.id}.xml"), encoding="utf-8", xml_declaration=True)
+            st = os.stat(os.path.join(self.artifacts_path, f"{artifact_id}.xml"))
+        except FileNotFoundError:
+            return False
+        return recorded[1:] == [st.st_mtime_ns, st.st_size]
+
+    def _serialize_artifact(self, artifact: BaseArtifact, serialize) -> bytes:
+        """Render a single artifact's XML file with its class entry in _ARTIFACT_SERIALIZERS."""
+        try:
+            return serialize(artifact)
         except Exception as e:
-            logger.error(f"Failed to save artifact {artifact.id}: {str(e)}")
+            logger.error("Failed to save artifact %s: %s", artifact.id, e)
             raise
 
     def load_project(self) -> ProjectState:
         """Load project state from XML files."""
         try:
-            logger.info(f"Loading project from {self.project_path}")
+            logger.info("Loading project from %s", self.project_path)
             
             # Load Config
             config_path = os.path.join(self.project_path, "project.xml")
@@ -159,21 +778,22 @@ class GitStorage:
             
             tree = ET.parse(config_path)
             root = tree.getroot()
-            name = root.find("Name").text
+            # One pass over the top-level elements instead of a find() per section
+            sections = {child.tag: child for child in root}
+            name = sections["Name"].text
             
             # Load levels (support both old str and new RequirementLevel format)
             levels = []
-            levels_elem = root.find("Levels")
+            levels_elem = sections.get("Levels")
             if levels_elem is not None:
-                for level_elem in levels_elem.findall("Level"):
+                for level_elem in levels_elem.iterfind("Level"):
                     # Check if it's new format (with Name/Description) or old format (just text)
-                    name_elem = level_elem.find("Name")
-                    if name_elem is not None:
+                    level_fields = {child.tag: child.text for child in level_elem}
+                    if "Name" in level_fields:
                         # New format
-                        desc_elem = level_elem.find("Description")
                         levels.append(RequirementLevel(
-                            name=name_elem.text,
-                            description=(desc_elem.text or "") if desc_elem is not None else ""
+                            name=level_fields["Name"],
+                            description=level_fields.get("Description") or ""
                         ))
                     else:
                         # Old format - convert to RequirementLevel for consistency
@@ -184,14 +804,13 @@ class GitStorage:
             
             # Load settings (with defaults if not present)
             settings = ProjectSettings()
-            settings_elem = root.find("Settings")
+            settings_elem = sections.get("Settings")
             if settings_elem is not None:
-                enforce_elem = settings_elem.find("EnforceSingleParent")
-                if enforce_elem is not None:
-                    settings.enforce_single_parent = enforce_elem.text == "True"
-                prevent_elem = settings_elem.find("PreventOrphansAtLowerLevels")
-                if prevent_elem is not None:
-                    settings.prevent_orphans_at_lower_levels = prevent_elem.text == "True"
+                setting_fields = {child.tag: child.text for child in settings_elem}
+                if "EnforceSingleParent" in setting_fields:
+                    settings.enforce_single_parent = setting_fields["EnforceSingleParent"] == "True"
+                if "PreventOrphansAtLowerLevels" in setting_fields:
+                    settings.prevent_orphans_at_lower_levels = setting_fields["PreventOrphansAtLowerLevels"] == "True"
             
             config = ProjectConfig(name=name, levels=levels, settings=settings)
 
@@ -199,95 +818,171 @@ class GitStorage:
             traces = []
             traces_path = os.path.join(self.project_path, "traces.xml")
             if os.path.exists(traces_path):
-                tree = ET.parse(traces_path)
-                root = tree.getroot()
-                for trace_elem in root.findall("Trace"):
-                    traces.append(Trace(
-                        source_id=trace_elem.find("SourceID").text,
-                        target_id=trace_elem.find("TargetID").text,
-                        type=trace_elem.find("Type").text,
-                        description=trace_elem.find("Description").text if trace_elem.find("Description") is not None else None
+                # Stream the traces and free each element once read, so memory stays flat however many there are
+                for _, trace_elem in ET.iterparse(traces_path, events=("end",), tag="Trace"):
+                    fields = {child.tag: child.text for child in trace_elem}
+                    traces.append(Trace.model_construct(
+                        source_id=fields["SourceID"],
+                        target_id=fields["TargetID"],
+                        type=_TRACE_TYPES[fields["Type"]],
+                        description=fields.get("Description")
                     ))
+                    trace_elem.clear()
+                    # Drop already-processed siblings still referenced by the root
+                    while trace_elem.getprevious() is not None:
+                        del trace_elem.getparent()[0]
+
+            # Load Artifacts, from the shard when it still matches the files
+            # (the key is taken before reading, so a concurrent save only makes it stale)
+            entries = self._scan_artifact_files()
+            shard_key = self._shard_key(entries)
+            artifacts = self._read_shard(shard_key)
+            if artifacts is None:
+                artifacts = self._load_artifact_files(entries)
+                self._write_shard(artifacts, shard_key)
 
-            # Load Artifacts
-            artifacts = {}
-            if os.path.exists(self.artifacts_path):
-                for filename in os.listdir(self.artifacts_path):
-                    if filename.endswith(".xml"):
-                        tree = ET.parse(os.path.join(self.artifacts_path, filename))
-                        root = tree.getroot()
-                        art_type = ArtifactType(root.find("Type").text)
-                        art_id = root.find("ID").text
-                        title = root.find("Title").text
-                        desc = root.find("Description").text if root.find("Description") is not None else None
-                        
-                        if art_type == ArtifactType.REQUIREMENT:
-                            # Load parent IDs (support both old parent_id and new parent_ids)
-                            parent_ids = []
-                            parent_id = None
-                            
-                            # Check for new format (ParentIDs)
-                            parent_ids_elem = root.find("ParentIDs")
-                            if parent_ids_elem is not None:
-                                parent_ids = [p.text for p in parent_ids_elem.findall("ParentID")]
-                            else:
-                                # Check for old format (ParentID)
-                                parent_id_elem = root.find("ParentID")
-                                if parent_id_elem is not None:
-                                    parent_id = parent_id_elem.text
-                                    parent_ids = [parent_id] if parent_id else []
-                            
-                            # Load justification
-                            justification = None
-                            justification_elem = root.find("Justification")
-                            if justification_elem is not None:
-                                justification = justification_elem.text
-                            
-                            artifacts[art_id] = Requirement(
-                                id=art_id, title=title, description=desc,
-                                level=root.find("Level").text,
-                                parent_id=parent_id,
-                                parent_ids=parent_ids,
-                                justification=justification
-                            )
-                        elif art_type == ArtifactType.RISK_HAZARD:
-                            artifacts[art_id] = RiskHazard(
-                                id=art_id, title=title, description=desc,
-                                severity=root.find("Severity").text if root.find("Severity") is not None else None
-                            )
-                        elif art_type == ArtifactType.RISK_CAUSE:
-                            artifacts[art_id] = RiskCause(
-                                id=art_id, title=title, description=desc,
-                                probability=root.find("Probability").text if root.find("Probability") is not None else None
-                            )
-                        elif art_type == ArtifactType.VERIFICATION_ACTIVITY:
-                            artifacts[art_id] = VerificationActivity(
-                                id=art_id, title=title, description=desc,
-                                method=VerificationMethod(root.find("Method").text),
-                                procedure=root.find("Procedure").text if root.find("Procedure") is not None else None,
-                                setup=root.find("Setup").text if root.find("Setup") is not None else None,
-                                passed=root.find("Passed").text == "True"
-                            )
-
-            logger.info(f"Successfully loaded project with {len(artifacts)} artifacts and {len(traces)} traces")
-            return ProjectState(config=config, artifacts=artifacts, traces=traces)
+            logger.debug("Successfully loaded project with %d artifacts and %d traces", len(artifacts), len(traces))
+            state = ProjectState(config=config, artifacts=artifacts, traces=traces)
+            state.mark_clean()
+            return state
         except Exception as e:
-            logger.error(f"Failed to load project: {str(e)}")
+            logger.error("Failed to load project: %s", e)
             raise
 
-    def commit(self, message: str):
-        """Commit all changes to Git repository."""
+    def _load_artifact_files(self, entries: List[tuple]) -> Dict[str, BaseArtifact]:
+        """Parse the scanned artifact XML files, reusing cached parses of unchanged files."""
+        # Slots keep directory order whether an artifact came from the cache or a fresh parse
+        loaded: List[Optional[BaseArtifact]] = [None] * len(entries)
+        stale = []
+        with _parsed_cache_lock:
+            for i, (path, stamp, _) in enumerate(entries):
+                cached = _parsed_cache.get(path)
+                if cached is not None and cached[0] == stamp:
+                    _parsed_cache.move_to_end(path)
+                    loaded[i] = cached[1]
+                else:
+                    stale.append(i)
+
+        if stale:
+            # Read in inode order, which roughly follows on-disk layout (st_ino is 0 where unsupported)
+            stale.sort(key=lambda i: entries[i][2])
+            paths = [entries[i][0] for i in stale]
+            loaded_at = utc_now()
+            if _load_pool is not None and len(paths) >= PARALLEL_LOAD_THRESHOLD:
+                parsed = [_artifact_from_xml(ET.fromstring(data), loaded_at) for data in _load_pool.map(_read_file, paths)]
+            else:
+                parsed = _parse_artifact_files(paths, loaded_at)
+            for i, artifact in zip(stale, parsed):
+                loaded[i] = artifact
+            with _parsed_cache_lock:
+                for i in stale:
+                    _parsed_cache[entries[i][0]] = (entries[i][1], loaded[i])
+                    _parsed_cache.move_to_end(entries[i][0])
+                while len(_parsed_cache) > PARSED_CACHE_SIZE:
+                    _parsed_cache.popitem(last=False)
+
+        return {artifact.id: artifact for artifact in loaded if artifact is not None}
+
+    def _hash_objects(self, rel_paths: List[str]) -> List[BaseIndexEntry]:
+        """Write blobs for the given worktree paths with one git hash-object call."""
+        result = subprocess.run(
+            [self.repo.git.GIT_PYTHON_GIT_EXECUTABLE, "hash-object", "-w", "--stdin-paths"],
+            cwd=self.project_path, input="\n".join(rel_paths).encode("utf-8"),
+            capture_output=True, check=True,
+        )
+        shas = result.stdout.split()
+        if len(shas) != len(rel_paths):
+            raise RuntimeError(f"git hash-object returned {len(shas)} ids for {len(rel_paths)} paths")
+        return [BaseIndexEntry((REGULAR_FILE_MODE, bytes.fromhex(sha.decode()), 0, path)) for sha, path in zip(shas, rel_paths)]
+
+    def _gc_auto(self):
+        """Pack loose objects once git's own threshold (gc.auto) is reached."""
+        try:
+            # A no-op below the threshold; above it git detaches and packs in the background
+            self.repo.git.gc("--auto", "--quiet")
+        except git.GitCommandError as e:
+            logger.warning("git gc --auto failed: %s", e)
+
+    def commit(self, message: str) -> str:
+        """Commit all changes to Git repository and return the new commit's sha."""
         try:
-            logger.info(f"Committing changes: {message}")
-            self.repo.git.add(A=True)
-            self.repo.index.commit(message)
-            logger.info("Successfully committed changes")
+            logger.info("Committing changes: %s", message)
+            try:
+                with open(self._pending_path(), encoding="utf-8") as f:
+                    pending = set(f.read().splitlines())
+            except FileNotFoundError:
+                pending = None
+            if pending is None:
+                # Repository predates the journal, so stage the whole tree once
+                self.repo.git.add(A=True)
+            # repo.index re-reads the index file on every access, so use one IndexFile throughout
+            index = self.repo.index
+            if pending is not None:
+                # Stage only the files save_draft touched
+                added, removed = [], []
+                for path in pending:
+                    (added if os.path.exists(os.path.join(self.project_path, path)) else removed).append(path)
+                if added:
+                    # One git process writes every blob; index.add with bare paths would chdir the whole process
+                    index.add(self._hash_objects(added), write=False)
+                # IndexFile.remove shells out to git rm, so drop the entries directly
+                for path in removed:
+                    index.entries.pop((path, 0), None)
+                index.write()
+            entries = self._scan_artifact_files()
+            old_signature, old_key = self._state_signature(entries), self._shard_key(entries)
+            sha = index.commit(message).hexsha
+            open(self._pending_path(), "w").close()
+            self._rekey_caches(entries, old_signature, old_key)
+            self._gc_auto()
+            logger.debug("Successfully committed changes as %s", sha)
+            return sha
         except Exception as e:
-            logger.error(f"Failed to commit changes: {str(e)}")
+            logger.error("Failed to commit changes: %s", e)
             raise
 
-    def get_history(self):
-        return list(self.repo.iter_commits())
+    # Async wrappers so handlers never run the XML or git work on the event loop
+    async def load_project_async(self) -> ProjectState:
+        return await asyncio.to_thread(self.load_project)
+
+    async def load_project_cached_async(self) -> ProjectState:
+        return await asyncio.to_thread(self.load_project_cached)
+
+    async def save_draft_async(self, state: ProjectState):
+        await asyncio.to_thread(self.save_draft, state)
+
+    async def commit_async(self, message: str) -> str:
+        return await asyncio.to_thread(self.commit, message)
+
+    async def end_batch_async(self, message: Optional[str] = None):
+        await asyncio.to_thread(self.end_batch, message)
+
+    def get_history(self, max_count: Optional[int] = None, skip: int = 0) -> List[CommitInfo]:
+        """Commits reachable from HEAD, newest first, from a single git log call."""
+        args = [f"--pretty=format:%H{_FIELD_SEP}%an{_FIELD_SEP}%ae{_FIELD_SEP}%at{_FIELD_SEP}%s{_RECORD_SEP}"]
+        if max_count is not None:
+            args.append(f"--max-count={max_count}")
+        if skip:
+            args.append(f"--skip={skip}")
+        try:
+            output = self.repo.git.log(*args)
+        except git.GitCommandError:
+            # No commits yet
+            return []
+        history = []
+        for record in output.split(_RECORD_SEP):
+            record = record.strip("\n")
+            if record:
+                sha, author, email, timestamp, summary = record.split(_FIELD_SEP, 4)
+                history.append(CommitInfo(sha, author, email, int(timestamp), summary))
+        return history
 
     def checkout(self, commit_hash: str):
         self.repo.git.checkout(commit_hash)
+        # The working tree no longer matches the recorded hashes
+        try:
+            os.remove(self._hashes_path())
+        except FileNotFoundError:
+            pass
+        self._bump_generation()
+        self._evict_state()
@@ -5,8 +5,16 @@ from fastapi.testclient import TestClient
 from main import app
 from api import projects
 
+@pytest.fixture(scope="module")
+def _app_client():
+    """
+    One TestClient (and app startup) shared by every test in a module.
+    """
+    with TestClient(app) as c:
+        yield c
+
 @pytest.fixture(scope="function")
-def client(tmp_path):
+def client(_app_client, tmp_path):
     """
     Fixture to provide a TestClient with a temporary PROJECTS_ROOT.
     """
@@ -14,9 +22,9 @@ def client(tmp_path):
     original_root = projects.PROJECTS_ROOT
     projects.PROJECTS_ROOT = str(tmp_path / "projects_data")
     os.makedirs(projects.PROJECTS_ROOT, exist_ok=True)
-    
-    with TestClient(app) as c:
-        yield c
-    
-    # Restore original root
+
+    yield _app_client
+
+    # Restore original root and drop this test's projects
     projects.PROJECTS_ROOT = original_root
+    shutil.rmtree(tmp_path / "projects_data", ignore_errors=True)
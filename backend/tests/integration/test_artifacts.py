@@ -1,3 +1,16 @@
+import os
+import time
+import asyncio
+import threading
+import git
+import httpx
+from api import projects
+from api import artifacts as artifacts_api
+from main import app
+import storage
+from storage import GitStorage
+from models import ProjectConfig, ProjectState, Requirement, Trace, TraceType
+
 def test_create_requirement(client):
     client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
     
@@ -59,3 +72,233 @@ def test_commit_changes(client):
     
     response = client.post("/api/artifacts/TestProject/commit", json={"message": "Initial commit"})
     assert response.status_code == 200
+
+def test_commit_never_changes_directory(client, monkeypatch):
+    # Handlers run on worker threads; a chdir would move every other request's relative paths
+    def fail_chdir(path):
+        raise AssertionError(f"os.chdir({path!r}) called")
+    monkeypatch.setattr(os, "chdir", fail_chdir)
+
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    client.post("/api/artifacts/TestProject/artifacts", json={"type": "requirement", "id": "REQ-1", "title": "Req1", "level": "User"})
+    response = client.post("/api/artifacts/TestProject/commit", json={"message": "Add REQ-1"})
+    assert response.status_code == 200
+
+    repo = git.Repo(os.path.join(projects.PROJECTS_ROOT, "TestProject"))
+    assert "artifacts/REQ-1.xml" in [item.path for item in repo.head.commit.tree.traverse()]
+    assert not repo.is_dirty(untracked_files=True)
+
+def _slow_commits(monkeypatch) -> threading.Event:
+    """Make every commit take a while; the returned event is set once one starts."""
+    started = threading.Event()
+    commit = GitStorage.commit
+    def slow_commit(self, message):
+        started.set()
+        time.sleep(0.3)
+        return commit(self, message)
+    monkeypatch.setattr(GitStorage, "commit", slow_commit)
+    return started
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+def test_concurrent_commits_are_coalesced(client, monkeypatch):
+    client.post("/api/projects/", json={"name": "CommitBurst", "levels": ["User"]})
+    repo = git.Repo(os.path.join(projects.PROJECTS_ROOT, "CommitBurst"))
+    commits_before = len(list(repo.iter_commits()))
+    started = _slow_commits(monkeypatch)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            url = "/api/artifacts/CommitBurst/commit"
+            first = asyncio.create_task(ac.post(url, json={"message": "Change 0"}))
+            # The first request commits at once; the rest queue behind it as one batch
+            await _until(started.is_set)
+            rest = [asyncio.create_task(ac.post(url, json={"message": f"Change {i}"})) for i in range(1, 4)]
+            return await asyncio.gather(first, *rest)
+    responses = asyncio.run(run())
+
+    assert [r.status_code for r in responses] == [200] * 4
+    # Each client hears back its own message, with the sha of the commit that holds it
+    assert [r.json()["message"] for r in responses] == [f"Change {i}" for i in range(4)]
+    shas = [r.json()["sha"] for r in responses]
+    commits = list(repo.iter_commits())
+    assert len(commits) == commits_before + 2
+    assert shas[0] == commits[1].hexsha and commits[1].message == "Change 0"
+    # The queued requests share one commit, whose message joins theirs in arrival order
+    assert shas[1:] == [commits[0].hexsha] * 3
+    assert sorted(commits[0].message.split("\n\n")) == ["Change 1", "Change 2", "Change 3"]
+
+def test_cancelled_commit_request_still_commits_the_batch(client, monkeypatch):
+    client.post("/api/projects/", json={"name": "CommitCancel", "levels": ["User"]})
+    repo = git.Repo(os.path.join(projects.PROJECTS_ROOT, "CommitCancel"))
+    started = _slow_commits(monkeypatch)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            url = "/api/artifacts/CommitCancel/commit"
+            running = asyncio.create_task(ac.post(url, json={"message": "Running"}))
+            await _until(started.is_set)
+            # The request that opened the next batch goes away; the one that joined it still gets its commit
+            opener = asyncio.create_task(ac.post(url, json={"message": "Cancelled"}))
+            await _until(lambda: "CommitCancel" in artifacts_api._open_batches)
+            joiner = asyncio.create_task(ac.post(url, json={"message": "Joined"}))
+            await _until(lambda: len(artifacts_api._open_batches["CommitCancel"].messages) == 2)
+            opener.cancel()
+            return await asyncio.gather(running, opener, joiner, return_exceptions=True)
+    running, opener, joiner = asyncio.run(run())
+
+    assert running.status_code == 200
+    assert isinstance(opener, asyncio.CancelledError)
+    assert joiner.status_code == 200
+    assert joiner.json() == {"status": "committed", "message": "Joined", "sha": repo.head.commit.hexsha}
+    assert repo.head.commit.message == "Cancelled\n\nJoined"
+
+def test_delete_artifact(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    
+    req = client.post("/api/artifacts/TestProject/artifacts", json={
+        "type": "requirement", "title": "Req1", "level": "User"
+    }).json()
+    ver = client.post("/api/artifacts/TestProject/artifacts", json={
+        "type": "verification_activity", "title": "Test1", "method": "test"
+    }).json()
+    client.post("/api/artifacts/TestProject/traces", json={
+        "source_id": ver["id"], "target_id": req["id"], "type": "verifies"
+    })
+    
+    response = client.delete(f"/api/artifacts/TestProject/artifacts/{req['id']}")
+    assert response.status_code == 200
+    assert response.json()["traces_removed"] == 1
+    
+    data = client.get("/api/projects/TestProject").json()
+    assert req["id"] not in data["artifacts"]
+    assert ver["id"] in data["artifacts"]
+    assert data["traces"] == []
+
+def test_create_artifacts_bulk(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User", "System"]})
+    client.put("/api/projects/TestProject/settings", json={"prevent_orphans_at_lower_levels": True})
+
+    # The child comes first; its parent is later in the same batch
+    batch = {
+        "artifacts": [
+            {"type": "requirement", "id": "child", "title": "Child", "level": "System", "parent_ids": ["parent"]},
+            {"type": "requirement", "id": "parent", "title": "Parent", "level": "User"},
+        ],
+        "message": "Import requirements",
+    }
+    response = client.post("/api/artifacts/TestProject/artifacts/bulk", json=batch)
+    assert response.status_code == 200
+    assert [a["id"] for a in response.json()] == ["child", "parent"]
+
+    data = client.get("/api/projects/TestProject").json()
+    assert set(data["artifacts"]) == {"child", "parent"}
+
+    # An invalid artifact rejects the whole batch
+    response = client.post("/api/artifacts/TestProject/artifacts/bulk", json={"artifacts": [
+        {"type": "requirement", "id": "ok", "title": "Ok", "level": "User"},
+        {"type": "requirement", "id": "orphan", "title": "Orphan", "level": "System"},
+    ]})
+    assert response.status_code == 400
+    assert "ok" not in client.get("/api/projects/TestProject").json()["artifacts"]
+
+def test_create_artifacts_bulk_rejects_unstorable_text(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+
+    response = client.post("/api/artifacts/TestProject/artifacts/bulk", json={"artifacts": [
+        {"type": "requirement", "id": "valid", "title": "Valid", "level": "User"},
+        {"type": "requirement", "id": "invalid", "title": "Bad \u0001 title", "level": "User"},
+    ], "message": "Import"})
+    assert response.status_code == 400
+
+    # Neither artifact reaches the project, on disk or in the cached state
+    assert client.get("/api/projects/TestProject").json()["artifacts"] == {}
+    project_path = os.path.join(projects.PROJECTS_ROOT, "TestProject")
+    assert os.listdir(os.path.join(project_path, "artifacts")) == []
+
+def test_update_writes_only_the_changed_artifact(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    for i in range(3):
+        client.post("/api/artifacts/TestProject/artifacts", json={"type": "requirement", "id": f"REQ-{i}", "title": f"Req{i}", "level": "User"})
+    project_path = os.path.join(projects.PROJECTS_ROOT, "TestProject")
+    paths = [os.path.join(project_path, "traces.xml")] + [os.path.join(project_path, "artifacts", f"REQ-{i}.xml") for i in range(3)]
+    # Backdate every file, so any rewrite shows up as a new mtime
+    for path in paths:
+        os.utime(path, ns=(10**18, 10**18))
+
+    response = client.put("/api/artifacts/TestProject/artifacts/REQ-1", json={"type": "requirement", "id": "REQ-1", "title": "Edited", "level": "User"})
+    assert response.status_code == 200
+
+    rewritten = [os.path.basename(path) for path in paths if os.stat(path).st_mtime_ns != 10**18]
+    assert rewritten == ["REQ-1.xml"]
+
+def test_outside_edit_is_loaded_and_can_be_reverted(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    client.post("/api/artifacts/TestProject/artifacts", json={"type": "requirement", "id": "REQ-1", "title": "Original", "level": "User"})
+    file_path = os.path.join(projects.PROJECTS_ROOT, "TestProject", "artifacts", "REQ-1.xml")
+    with open(file_path, encoding="utf-8") as f:
+        original = f.read()
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(original.replace("Original", "Edited outside"))
+
+    assert client.get("/api/projects/TestProject").json()["artifacts"]["REQ-1"]["title"] == "Edited outside"
+
+    # Same content as the last save, but the file no longer holds it, so it must be written
+    client.put("/api/artifacts/TestProject/artifacts/REQ-1", json={"type": "requirement", "id": "REQ-1", "title": "Original", "level": "User"})
+    with open(file_path, encoding="utf-8") as f:
+        assert f.read() == original
+
+def test_commit_stages_files_from_a_failed_save(client, monkeypatch):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    client.post("/api/artifacts/TestProject/commit", json={"message": "Create project"})
+
+    # The save writes project.xml and one artifact, then fails on the other
+    write_file = storage._write_file
+    calls = []
+    def failing_write_file(path, data):
+        calls.append(path)
+        if len(calls) == 3:
+            raise OSError("disk full")
+        write_file(path, data)
+    monkeypatch.setattr(storage, "_write_file", failing_write_file)
+    response = client.post("/api/artifacts/TestProject/artifacts/bulk", json={"artifacts": [
+        {"type": "requirement", "id": "REQ-1", "title": "Req1", "level": "User"},
+        {"type": "requirement", "id": "REQ-2", "title": "Req2", "level": "User"},
+    ]})
+    assert response.status_code == 500
+    monkeypatch.setattr(storage, "_write_file", write_file)
+
+    response = client.post("/api/artifacts/TestProject/commit", json={"message": "After failed save"})
+    assert response.status_code == 200
+    repo = git.Repo(os.path.join(projects.PROJECTS_ROOT, "TestProject"))
+    written = "artifacts/" + os.path.basename(calls[1])
+    assert written in [item.path for item in repo.head.commit.tree.traverse()]
+    assert not repo.is_dirty(untracked_files=True)
+
+def test_delete_artifact_compacts_traces_in_place():
+    state = ProjectState(config=ProjectConfig(name="TestProject"), artifacts={
+        artifact_id: Requirement(id=artifact_id, title=artifact_id, level="User") for artifact_id in ("A", "B", "C")
+    }, traces=[
+        Trace(source_id="A", target_id="B", type=TraceType.SATISFIES),
+        Trace(source_id="B", target_id="C", type=TraceType.SATISFIES),
+        Trace(source_id="C", target_id="A", type=TraceType.VERIFIES),
+        Trace(source_id="A", target_id="A", type=TraceType.CAUSES),
+    ])
+    traces = state.traces
+    a_to_b, b_to_c, c_to_a, a_to_a = traces
+    assert state.has_trace(a_to_b)  # Builds the index before the delete
+
+    removed = state.delete_artifact("B")
+
+    assert removed == [a_to_b, b_to_c]
+    # Same list object, survivors in their original order
+    assert state.traces is traces
+    assert state.traces == [c_to_a, a_to_a]
+    _, by_artifact = state._trace_index()
+    assert "B" not in by_artifact
+    assert by_artifact["A"] == [c_to_a, a_to_a]
+    assert by_artifact["C"] == [c_to_a]
+    assert not state.has_trace(a_to_b) and not state.has_trace(b_to_c)
+    assert state.has_trace(c_to_a)
@@ -1,3 +1,9 @@
+import os
+from api import projects
+import storage as storage_module
+from concurrent.futures import ThreadPoolExecutor
+from storage import GitStorage
+
 def test_create_project(client):
     response = client.post("/api/projects/", json={"name": "TestProject", "levels": ["User", "System"]})
     assert response.status_code == 200
@@ -31,3 +37,102 @@ def test_get_project(client):
 def test_get_nonexistent_project(client):
     response = client.get("/api/projects/NonExistent")
     assert response.status_code == 404
+
+def test_load_sees_in_place_artifact_edit(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    client.post("/api/artifacts/TestProject/artifacts", json={"type": "requirement", "id": "REQ-1", "title": "Old title", "level": "User"})
+    project_path = os.path.join(projects.PROJECTS_ROOT, "TestProject")
+    storage = GitStorage(project_path)
+    assert storage.load_project().artifacts["REQ-1"].title == "Old title"
+
+    # Rewrite the file in place, leaving the directory mtime as it was
+    artifacts_dir = os.path.join(project_path, "artifacts")
+    dir_stat = os.stat(artifacts_dir)
+    file_path = os.path.join(artifacts_dir, "REQ-1.xml")
+    with open(file_path, encoding="utf-8") as f:
+        xml = f.read()
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(xml.replace("Old title", "New title, longer"))
+    os.utime(artifacts_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+    assert storage.load_project().artifacts["REQ-1"].title == "New title, longer"
+
+def test_get_project_sees_in_place_artifact_edit(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    client.post("/api/artifacts/TestProject/artifacts", json={"type": "requirement", "id": "REQ-1", "title": "Old title", "level": "User"})
+    assert client.get("/api/projects/TestProject").json()["artifacts"]["REQ-1"]["title"] == "Old title"
+
+    # Edit outside the app, leaving the directory mtime as it was
+    artifacts_dir = os.path.join(projects.PROJECTS_ROOT, "TestProject", "artifacts")
+    dir_stat = os.stat(artifacts_dir)
+    file_path = os.path.join(artifacts_dir, "REQ-1.xml")
+    with open(file_path, encoding="utf-8") as f:
+        xml = f.read()
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(xml.replace("Old title", "New title, longer"))
+    os.utime(artifacts_dir, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+    assert client.get("/api/projects/TestProject").json()["artifacts"]["REQ-1"]["title"] == "New title, longer"
+
+def test_save_drops_the_shard_and_load_rebuilds_it(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    for i in range(2):
+        client.post("/api/artifacts/TestProject/artifacts", json={"type": "requirement", "id": f"REQ-{i}", "title": f"Req{i}", "level": "User"})
+    storage = GitStorage(os.path.join(projects.PROJECTS_ROOT, "TestProject"))
+    storage.load_project()
+    assert os.path.exists(storage._shard_path())
+
+    # A save leaves every other artifact alone, so it drops the shard rather than rewriting it
+    client.put("/api/artifacts/TestProject/artifacts/REQ-1", json={"type": "requirement", "id": "REQ-1", "title": "Edited", "level": "User"})
+    assert not os.path.exists(storage._shard_path())
+
+    assert storage.load_project().artifacts["REQ-1"].title == "Edited"
+    assert os.path.exists(storage._shard_path())
+    assert storage.load_project().artifacts["REQ-1"].title == "Edited"
+
+def test_threaded_load_matches_serial_load(client, monkeypatch):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    client.post("/api/artifacts/TestProject/artifacts/bulk", json={"artifacts": [
+        {"type": "requirement", "id": f"REQ-{i}", "title": f"Req{i}", "level": "User"} for i in range(5)
+    ]})
+    storage = GitStorage(os.path.join(projects.PROJECTS_ROOT, "TestProject"))
+
+    def load():
+        storage_module._parsed_cache.clear()
+        return storage._load_artifact_files(storage._scan_artifact_files())
+    serial = load()
+
+    # Force the pool path, which a single-core host never takes
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        monkeypatch.setattr(storage_module, "_load_pool", pool)
+        monkeypatch.setattr(storage_module, "PARALLEL_LOAD_THRESHOLD", 1)
+        threaded = load()
+
+    assert sorted(threaded) == [f"REQ-{i}" for i in range(5)]
+    assert {k: v.model_dump(exclude={"created_at", "updated_at"}) for k, v in threaded.items()} == \
+        {k: v.model_dump(exclude={"created_at", "updated_at"}) for k, v in serial.items()}
+
+def test_get_project_history(client):
+    client.post("/api/projects/", json={"name": "TestProject", "levels": ["User"]})
+    client.post("/api/artifacts/TestProject/artifacts", json={"type": "requirement", "id": "REQ-1", "title": "Req1", "level": "User"})
+    first = client.post("/api/artifacts/TestProject/commit", json={"message": "Add REQ-1"}).json()["sha"]
+    client.post("/api/artifacts/TestProject/artifacts", json={"type": "requirement", "id": "REQ-2", "title": "Req2", "level": "User"})
+    second = client.post("/api/artifacts/TestProject/commit", json={"message": "Add REQ-2"}).json()["sha"]
+
+    response = client.get("/api/projects/TestProject/history")
+    assert response.status_code == 200
+    history = response.json()
+    # Newest first, down to the commits made when the project was created
+    assert [entry["sha"] for entry in history[:2]] == [second, first]
+    assert [entry["summary"] for entry in history[:2]] == ["Add REQ-2", "Add REQ-1"]
+    assert history[-1]["summary"] == "Initial commit"
+    for entry in history:
+        assert set(entry) == {"sha", "author", "email", "timestamp", "summary"}
+        assert isinstance(entry["timestamp"], int)
+    assert history[0]["timestamp"] >= history[1]["timestamp"]
+
+    page = client.get("/api/projects/TestProject/history", params={"max_count": 1, "skip": 1}).json()
+    assert [entry["sha"] for entry in page] == [first]
+
+def test_get_history_of_nonexistent_project(client):
+    assert client.get("/api/projects/NonExistent/history").status_code == 404
@@ -0,0 +1,80 @@
+import gzip
+import pytest
+from fastapi.testclient import TestClient
+import static_files
+from app_factory import build_app
+
+INDEX_HTML = b"<!doctype html><title>SEALMit</title>"
+APP_JS = b"console.log('sealmit');" * 50
+
+@pytest.fixture
+def dist(tmp_path):
+    """A built frontend: index.html, a hashed asset with precompressed siblings, and a file outside dist."""
+    dist = tmp_path / "dist"
+    (dist / "assets").mkdir(parents=True)
+    (dist / "index.html").write_bytes(INDEX_HTML)
+    (dist / "favicon.svg").write_bytes(b"<svg/>")
+    (dist / "assets" / "app-1a2b3c.js").write_bytes(APP_JS)
+    (dist / "assets" / "app-1a2b3c.js.gz").write_bytes(gzip.compress(APP_JS))
+    (dist / "assets" / "app-1a2b3c.js.br").write_bytes(b"brotli bytes")
+    (tmp_path / "secret.txt").write_bytes(b"not for the browser")
+    return dist
+
+@pytest.fixture
+def static_client(dist, monkeypatch):
+    monkeypatch.setattr(static_files, "frontend_dist", str(dist))
+    with TestClient(build_app(serve_static=True)) as c:
+        yield c
+
+def test_index_is_revalidated_with_etag(static_client):
+    response = static_client.get("/")
+    assert response.status_code == 200
+    assert response.content == INDEX_HTML
+    assert response.headers["cache-control"] == "no-cache"
+
+    response = static_client.get("/", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+
+def test_client_routes_fall_back_to_index(static_client):
+    response = static_client.get("/projects/Demo/requirements")
+    assert response.status_code == 200
+    assert response.content == INDEX_HTML
+
+def test_assets_are_immutable_with_etag(static_client):
+    response = static_client.get("/assets/app-1a2b3c.js", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.content == APP_JS
+    assert response.headers["cache-control"] == static_files.IMMUTABLE_CACHE_CONTROL
+    assert "content-encoding" not in response.headers
+
+    response = static_client.get("/assets/app-1a2b3c.js", headers={"Accept-Encoding": "identity", "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+    # Files outside assets/ have no content hash in their name, so they aren't immutable
+    assert "cache-control" not in static_client.get("/favicon.svg").headers
+
+def test_precompressed_siblings_are_negotiated(static_client):
+    response = static_client.get("/assets/app-1a2b3c.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "accept-encoding"
+    assert "javascript" in response.headers["content-type"]
+    assert response.content == APP_JS  # Decoded by the client
+
+    # Headers only: the placeholder body isn't real brotli for the client to decode
+    with static_client.stream("GET", "/assets/app-1a2b3c.js", headers={"Accept-Encoding": "br, gzip"}) as response:
+        assert response.headers["content-encoding"] == "br"
+        assert response.headers["content-length"] == str(len(b"brotli bytes"))
+
+def test_path_traversal_is_not_served(static_client):
+    for path in ("/..%2Fsecret.txt", "/%2e%2e/secret.txt", "/assets/..%2F..%2Fsecret.txt"):
+        # The app sees "../secret.txt", which isn't in the manifest, so it gets the SPA shell
+        assert static_client.get(path).content == INDEX_HTML
+
+def test_unknown_api_path_is_json_404(static_client):
+    response = static_client.get("/api/does-not-exist")
+    assert response.status_code == 404
+    assert response.json() == {"error": "API path not found"}
+
+def test_static_files_reject_writes(static_client):
+    assert static_client.post("/index.html").status_code == 405
@@ -1,23 +1,23 @@
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from _wait import wait_for_server
 
 BASE_URL = "http://localhost:8000/api"
 
+# One keep-alive connection, reused by every request below
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
 def test_ai():
     # Wait for server
-    for _ in range(10):
-        try:
-            requests.get("http://localhost:8000/")
-            break
-        except:
-            time.sleep(1)
+    wait_for_server(session, "http://localhost:8000/")
     
     # Chat
     chat_req = {
         "message": "Hello AI",
         "history": []
     }
-    response = requests.post(f"{BASE_URL}/ai/chat", json=chat_req)
+    response = session.post(f"{BASE_URL}/ai/chat", json=chat_req)
     print(f"Chat: {response.status_code}")
     if response.status_code == 200:
         print(response.json())
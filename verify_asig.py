@@ -1,19 +1,19 @@
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from _wait import wait_for_server
 
 BASE_URL = "http://localhost:8080"
 
+# One keep-alive connection, reused by every request below
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
 def test_asig():
     # Wait for server
-    for _ in range(10):
-        try:
-            requests.get(BASE_URL)
-            break
-        except:
-            time.sleep(1)
+    wait_for_server(session, BASE_URL)
     
     # Check index.html
-    response = requests.get(BASE_URL)
+    response = session.get(BASE_URL)
     print(f"Index: {response.status_code}")
     if response.status_code == 200 and "<html" in response.text:
         print("Index served successfully")
@@ -21,7 +21,7 @@ def test_asig():
         print("Failed to serve index")
 
     # Check API
-    response = requests.get(f"{BASE_URL}/api/")
+    response = session.get(f"{BASE_URL}/api/")
     print(f"API Root: {response.status_code}")
     if response.status_code == 200:
         print("API served successfully")
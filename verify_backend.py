@@ -1,23 +1,23 @@
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from _wait import wait_for_server
 
 BASE_URL = "http://localhost:8000/api"
 
+# One keep-alive connection, reused by every request below
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
 def test_api():
     # Wait for server
-    for _ in range(10):
-        try:
-            requests.get("http://localhost:8000/")
-            break
-        except:
-            time.sleep(1)
+    wait_for_server(session, "http://localhost:8000/")
     
     # Create Project
     project_config = {
         "name": "TestProject",
         "levels": ["User", "System"]
     }
-    response = requests.post(f"{BASE_URL}/projects/", json=project_config)
+    response = session.post(f"{BASE_URL}/projects/", json=project_config)
     print(f"Create Project: {response.status_code}")
     if response.status_code != 200:
         print(response.text)
@@ -29,7 +29,7 @@ def test_api():
         "title": "System must be fast",
         "level": "System"
     }
-    response = requests.post(f"{BASE_URL}/artifacts/TestProject/artifacts", json=req)
+    response = session.post(f"{BASE_URL}/artifacts/TestProject/artifacts", json=req)
     print(f"Create Artifact: {response.status_code}")
     if response.status_code != 200:
         print(response.text)
@@ -37,7 +37,7 @@ def test_api():
     req_id = response.json()["id"]
 
     # Commit
-    response = requests.post(f"{BASE_URL}/artifacts/TestProject/commit", json={"message": "First commit"})
+    response = session.post(f"{BASE_URL}/artifacts/TestProject/commit", json={"message": "First commit"})
     print(f"Commit: {response.status_code}")
 
 if __name__ == "__main__":
@@ -3,22 +3,42 @@ End-to-end test for SEALMit backend API.
 Tests complete workflow: create project, add artifacts, create traces, commit.
 """
 import requests
-import time
+from requests.adapters import HTTPAdapter
+import _wait
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://localhost:8000/api"
 
+def new_session():
+    """A session holding one keep-alive connection."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    return session
+
+# Used by the main thread only; requests.Session isn't thread-safe, so each pool worker gets its own
+session = new_session()
+MAX_PARALLEL_REQUESTS = 4
+_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS)
+_worker = threading.local()
+
+def worker_session():
+    """The calling thread's own session, created on first use and kept for its later requests."""
+    if not hasattr(_worker, "session"):
+        _worker.session = new_session()
+    return _worker.session
+
+def create_artifacts(artifacts):
+    """POST artifacts that don't depend on each other concurrently; responses keep the input order."""
+    return list(_pool.map(lambda artifact: worker_session().post(f"{BASE_URL}/artifacts/TestE2EProject/artifacts", json=artifact), artifacts))
+
 def wait_for_server():
     """Wait for server to be ready."""
     print("Waiting for server...")
-    for i in range(30):
-        try:
-            response = requests.get("http://localhost:8000/")
-            if response.status_code == 200:
-                print("✓ Server is ready")
-                return True
-        except requests.exceptions.ConnectionError:
-            time.sleep(1)
+    if _wait.wait_for_server(session, "http://localhost:8000/"):
+        print("✓ Server is ready")
+        return True
     print("✗ Server not available")
     return False
 
@@ -29,7 +49,7 @@ def test_create_project():
         "name": "TestE2EProject",
         "levels": ["User", "System", "Performance"]
     }
-    response = requests.post(f"{BASE_URL}/projects/", json=project_config)
+    response = session.post(f"{BASE_URL}/projects/", json=project_config)
     print(f"Create Project: {response.status_code}")
     if response.status_code != 200:
         print(f"Error: {response.text}")
@@ -47,8 +67,7 @@ def test_create_requirements():
     ]
     
     req_ids = []
-    for req in requirements:
-        response = requests.post(f"{BASE_URL}/artifacts/TestE2EProject/artifacts", json=req)
+    for req, response in zip(requirements, create_artifacts(requirements)):
         if response.status_code != 200:
             print(f"✗ Failed to create requirement: {req['title']}")
             print(f"Error: {response.text}")
@@ -68,24 +87,23 @@ def test_create_risks():
         "description": "User gains unauthorized access to system",
         "severity": "High"
     }
-    response = requests.post(f"{BASE_URL}/artifacts/TestE2EProject/artifacts", json=hazard)
-    if response.status_code != 200:
-        print(f"✗ Failed to create hazard")
-        return None, None
-    hazard_id = response.json()["id"]
-    print(f"✓ Created hazard: {hazard['title']} (ID: {hazard_id[:8]}...)")
-    
     cause = {
         "type": "risk_cause",
         "title": "Weak password policy",
         "description": "Users can set weak passwords",
         "probability": "Medium"
     }
-    response = requests.post(f"{BASE_URL}/artifacts/TestE2EProject/artifacts", json=cause)
-    if response.status_code != 200:
+    hazard_response, cause_response = create_artifacts([hazard, cause])
+    if hazard_response.status_code != 200:
+        print(f"✗ Failed to create hazard")
+        return None, None
+    hazard_id = hazard_response.json()["id"]
+    print(f"✓ Created hazard: {hazard['title']} (ID: {hazard_id[:8]}...)")
+    
+    if cause_response.status_code != 200:
         print(f"✗ Failed to create cause")
         return hazard_id, None
-    cause_id = response.json()["id"]
+    cause_id = cause_response.json()["id"]
     print(f"✓ Created cause: {cause['title']} (ID: {cause_id[:8]}...)")
     
     return hazard_id, cause_id
@@ -101,7 +119,7 @@ def test_create_verification():
         "procedure": "1. Enter credentials 2. Click login 3. Verify success",
         "passed": True
     }
-    response = requests.post(f"{BASE_URL}/artifacts/TestE2EProject/artifacts", json=verification)
+    response = session.post(f"{BASE_URL}/artifacts/TestE2EProject/artifacts", json=verification)
     if response.status_code != 200:
         print(f"✗ Failed to create verification")
         return None
@@ -119,7 +137,7 @@ def test_create_traces(req_ids, hazard_id, cause_id, ver_id):
     ]
     
     for trace in traces:
-        response = requests.post(f"{BASE_URL}/artifacts/TestE2EProject/traces", json=trace)
+        response = session.post(f"{BASE_URL}/artifacts/TestE2EProject/traces", json=trace)
         if response.status_code != 200:
             print(f"✗ Failed to create trace: {trace['type']}")
             print(f"Error: {response.text}")
@@ -131,7 +149,7 @@ def test_create_traces(req_ids, hazard_id, cause_id, ver_id):
 def test_commit():
     """Test committing changes to Git."""
     print("\n=== Testing Git Commit ===")
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/artifacts/TestE2EProject/commit",
         json={"message": "E2E test: Added requirements, risks, verification, and traces"}
     )
@@ -145,7 +163,7 @@ def test_commit():
 def test_get_project():
     """Test retrieving complete project state."""
     print("\n=== Testing Project Retrieval ===")
-    response = requests.get(f"{BASE_URL}/projects/TestE2EProject")
+    response = session.get(f"{BASE_URL}/projects/TestE2EProject")
     if response.status_code != 200:
         print(f"✗ Failed to get project")
         return False